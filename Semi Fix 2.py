@@ -15,9 +15,51 @@ class Node:
         self.data = []
         self.left = None
         self.right = None
+        self.height = 1
         self.x = 0
         self.y = 0
 
+# --- Penyeimbangan AVL ---
+# Data ekspor harian biasanya sudah terurut berdasarkan 'Nama Obat'. Tanpa
+# penyeimbangan, pohon akan berubah menjadi linked list (pencarian O(n) dan
+# insert rekursif melewati batas rekursi Python). Rotasi AVL menjaga tinggi
+# pohon tetap O(log n).
+def _tinggi(node):
+    return node.height if node else 0
+
+def _perbarui_tinggi(node):
+    node.height = 1 + max(_tinggi(node.left), _tinggi(node.right))
+
+def _rotasi_kanan(y):
+    x = y.left
+    y.left = x.right
+    x.right = y
+    _perbarui_tinggi(y)
+    _perbarui_tinggi(x)
+    return x
+
+def _rotasi_kiri(x):
+    y = x.right
+    x.right = y.left
+    y.left = x
+    _perbarui_tinggi(x)
+    _perbarui_tinggi(y)
+    return y
+
+def _seimbangkan(node):
+    """Memperbarui tinggi node lalu melakukan rotasi AVL bila diperlukan."""
+    _perbarui_tinggi(node)
+    faktor = _tinggi(node.left) - _tinggi(node.right)
+    if faktor > 1:
+        if _tinggi(node.left.left) < _tinggi(node.left.right):
+            node.left = _rotasi_kiri(node.left)
+        return _rotasi_kanan(node)
+    if faktor < -1:
+        if _tinggi(node.right.right) < _tinggi(node.right.left):
+            node.right = _rotasi_kanan(node.right)
+        return _rotasi_kiri(node)
+    return node
+
 def insert(root, row):
     if 'Nama Obat' not in row or pd.isna(row['Nama Obat']):
         return root
@@ -36,7 +78,47 @@ def insert(root, row):
         root.right = insert(root.right, row)
     else:
         root.data.append(row.to_dict() if isinstance(row, pd.Series) else row)
-    return root 
+        return root
+    return _seimbangkan(root)
+
+# --- Bulk load: bangun BST seimbang langsung dari DataFrame ---
+def _bangun_dari_terurut(kunci, batas, records, kiri, kanan):
+    """Membangun subtree seimbang dari kunci unik terurut kunci[kiri:kanan]."""
+    if kiri >= kanan:
+        return None
+    tengah = (kiri + kanan) // 2
+    node = Node(kunci[tengah])
+    node.data = records[batas[tengah]:batas[tengah + 1]]
+    node.left = _bangun_dari_terurut(kunci, batas, records, kiri, tengah)
+    node.right = _bangun_dari_terurut(kunci, batas, records, tengah + 1, kanan)
+    _perbarui_tinggi(node)
+    return node
+
+def bangun_bst(df):
+    """
+    Membangun BST dari seluruh DataFrame sekaligus, tanpa iterrows().
+    'Nama Obat' dinormalisasi dengan operasi string vektor, baris diurutkan
+    satu kali (stabil, sehingga urutan data per obat sama dengan urutan CSV),
+    lalu pohon seimbang dibentuk langsung dari daftar kunci unik terurut.
+    """
+    if df.empty or 'Nama Obat' not in df.columns:
+        return None
+
+    kunci = df['Nama Obat'].astype("string").str.strip().str.lower()
+    posisi = np.flatnonzero((kunci.notna() & (kunci != "")).to_numpy())
+    if len(posisi) == 0:
+        return None
+    kunci_valid = kunci.to_numpy(dtype=object)[posisi]
+    urutan = np.argsort(kunci_valid, kind='stable')
+    kunci_terurut = kunci_valid[urutan]
+
+    # Indeks awal setiap grup kunci yang sama, ditambah batas akhir.
+    batas = np.flatnonzero(kunci_terurut[1:] != kunci_terurut[:-1]) + 1
+    batas = np.concatenate(([0], batas, [len(kunci_terurut)]))
+    kunci_unik = kunci_terurut[batas[:-1]]
+
+    records = df.iloc[posisi[urutan]].to_dict('records')
+    return _bangun_dari_terurut(kunci_unik, batas, records, 0, len(kunci_unik))
 
 def search(root, nama_obat_cari):
     if not nama_obat_cari or not isinstance(nama_obat_cari, str):
@@ -57,8 +139,7 @@ def search(root, nama_obat_cari):
 
 root = None
 if not df.empty:
-    for _, row in df.iterrows():
-        root = insert(root, row)
+    root = bangun_bst(df)
 else:
     print("DataFrame kosong, BST tidak dibangun.")
 
@@ -0,0 +1,568 @@
+"""
+Benchmark sederhana untuk struktur data pencarian obat di main.py.
+
+Jalankan dengan:
+    python benchmark.py avl [jumlah_obat]
+    python benchmark.py node [jumlah_obat]
+    python benchmark.py startup [jumlah_baris]
+    python benchmark.py fuzzy [jumlah_obat]
+    python benchmark.py snapshot [jumlah_baris]
+    python benchmark.py bertahap [jumlah_baris]
+    python benchmark.py coldstart [jumlah_baris]
+    python benchmark.py batch [jumlah_nama]
+    python benchmark.py tambah [jumlah_baris]
+    python benchmark.py render [jumlah_obat]
+    python benchmark.py beban [jumlah_request]
+    python benchmark.py suite [jumlah_baris] [jumlah_obat] [skew] [file_output]
+
+`suite` mengukur seluruh jalur utama (load CSV, build pohon, search(),
+cari_obat_gradio(), visualisasi) dan menyimpan hasilnya sebagai JSON agar
+bisa dibandingkan antar commit.
+"""
+import json
+import math
+import multiprocessing
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import matplotlib
+matplotlib.use("Agg")
+import numpy as np
+import pandas as pd
+
+import main
+
+
+def _nama_obat_terurut(jumlah):
+    """Nama obat unik yang sudah terurut (kasus terburuk untuk BST biasa)."""
+    lebar = len(str(jumlah))
+    return [f"obat {i:0{lebar}d}" for i in range(jumlah)]
+
+
+def bench_avl(jumlah_obat=100_000, jumlah_cari=10_000):
+    """Mengukur tinggi pohon dan latensi search() pada input terurut."""
+    print(f"{'n':>10} {'tinggi':>7} {'log2(n)':>8} {'build (s)':>10} {'search (us)':>12}")
+    n = 1_000
+    while n <= jumlah_obat:
+        nama = _nama_obat_terurut(n)
+
+        mulai = time.perf_counter()
+        root = None
+        for posisi, nama_obat in enumerate(nama):
+            root = main.insert(root, {'Nama Obat': nama_obat}, posisi)
+        waktu_build = time.perf_counter() - mulai
+
+        sampel = random.choices(nama, k=jumlah_cari)
+        mulai = time.perf_counter()
+        for nama_obat in sampel:
+            main.search(root, nama_obat)
+        waktu_cari = (time.perf_counter() - mulai) / jumlah_cari
+
+        print(f"{n:>10} {root.height:>7} {math.log2(n):>8.1f} "
+              f"{waktu_build:>10.2f} {waktu_cari * 1e6:>12.2f}")
+        n *= 10
+
+
+class NodeLama:
+    """Node sebelum __slots__: __dict__ per instance dan atribut x/y plot."""
+    def __init__(self, nama_obat):
+        self.nama_obat = nama_obat
+        self.data = np.empty(0, dtype=np.int64)
+        self.left = None
+        self.right = None
+        self.height = 1
+        self.x = 0
+        self.y = 0
+
+
+def bench_node(jumlah_obat=1_000_000):
+    """Memori pohon (tracemalloc) per kunci unik: NodeLama vs main.Node."""
+    nama = np.array(_nama_obat_terurut(jumlah_obat), dtype=object)
+    batas = np.arange(jumlah_obat + 1, dtype=np.int64)
+    baris = np.arange(jumlah_obat, dtype=np.int64)
+    print(f"{jumlah_obat} kunci unik")
+    # Kunci dari CSV berupa str (array object); dari snapshot berupa numpy.str_.
+    for sumber, kunci in (("CSV", nama), ("snapshot", nama.astype(str))):
+        for label, kelas in (("Node lama", NodeLama), ("Node", main.Node)):
+            node_asli, main.Node = main.Node, kelas
+            try:
+                tracemalloc.start()
+                root = main._bangun_dari_terurut(kunci, batas, baris, 0, jumlah_obat)
+                terpakai = tracemalloc.get_traced_memory()[0]
+                tracemalloc.stop()
+            finally:
+                main.Node = node_asli
+            print(f"{sumber:9s} {label:10s}: {terpakai / 1e6:8.1f} MB, {terpakai / jumlah_obat:6.1f} byte/kunci")
+            del root
+
+
+def _buat_pesanan(jumlah_baris, jumlah_obat, seed=0, skew=0.0):
+    """
+    DataFrame pesanan sintetis dengan skema yang sama seperti 'Data SDA.csv'.
+    `skew` > 0 membuat popularitas obat mengikuti distribusi Zipf (obat ke-r
+    dipesan sebanding 1 / r**skew); 0 berarti seragam.
+    """
+    rng = np.random.default_rng(seed)
+    lebar = len(str(jumlah_obat))
+    if skew > 0:
+        bobot = 1.0 / np.arange(1, jumlah_obat + 1) ** skew
+        idx_obat = rng.choice(jumlah_obat, jumlah_baris, p=bobot / bobot.sum())
+    else:
+        idx_obat = rng.integers(0, jumlah_obat, jumlah_baris)
+    return pd.DataFrame({
+        'Nama Pemesan': [f"Pemesan {i}" for i in rng.integers(0, 50_000, jumlah_baris)],
+        'Kategori Penyakit': rng.choice(['Migrain', 'Cacingan', 'Hipertensi', 'Diabetes', 'Flu'], jumlah_baris),
+        'Nama Obat': [f"Obat {i:0{lebar}d}" for i in idx_obat],
+        'Tanggal Pesan': (np.datetime64('2024-01-01') + rng.integers(0, 730, jumlah_baris)).astype(str),
+    })
+
+
+def bench_startup(jumlah_baris=200_000, jumlah_obat=10_000):
+    """Membandingkan build iterrows() + insert() dengan bangun_bst()."""
+    df = _buat_pesanan(jumlah_baris, jumlah_obat)
+    print(f"{jumlah_baris} baris, {jumlah_obat} obat unik")
+
+    mulai = time.perf_counter()
+    root_bulk = main.bangun_bst(df)
+    waktu_bulk = time.perf_counter() - mulai
+    print(f"bangun_bst()         : {waktu_bulk:8.2f} s (tinggi {root_bulk.height})")
+
+    mulai = time.perf_counter()
+    root_loop = None
+    for posisi, (_, row) in enumerate(df.iterrows()):
+        root_loop = main.insert(root_loop, row, posisi)
+    waktu_loop = time.perf_counter() - mulai
+    print(f"iterrows() + insert(): {waktu_loop:8.2f} s (tinggi {root_loop.height})")
+    print(f"Percepatan           : {waktu_loop / waktu_bulk:8.1f}x")
+
+
+def _nama_obat_acak(jumlah, seed=0):
+    """Nama obat sintetis unik dari gabungan suku kata."""
+    rng = random.Random(seed)
+    suku_kata = ["pa", "ra", "ce", "ta", "mol", "am", "lo", "di", "pin", "me", "for",
+                 "min", "bu", "pro", "fen", "sal", "bu", "tol", "ome", "zol", "sta", "tin"]
+    nama = set()
+    while len(nama) < jumlah:
+        nama.add("".join(rng.choices(suku_kata, k=rng.randint(3, 5))))
+    return sorted(nama)
+
+
+def _salah_ketik(nama, rng):
+    """Satu kesalahan ketik acak: hapus, ganti, atau sisip satu huruf."""
+    i = rng.randrange(len(nama))
+    huruf = rng.choice("abcdefghijklmnopqrstuvwxyz")
+    jenis = rng.randrange(3)
+    if jenis == 0:
+        return nama[:i] + nama[i + 1:]
+    if jenis == 1:
+        return nama[:i] + huruf + nama[i + 1:]
+    return nama[:i] + huruf + nama[i:]
+
+
+def bench_fuzzy(jumlah_obat=50_000, jumlah_cari=1_000, jumlah_cari_brute=5):
+    """Membandingkan IndeksNgram.cari() dengan pemindaian jarak edit penuh."""
+    rng = random.Random(1)
+    nama = _nama_obat_acak(jumlah_obat)
+
+    mulai = time.perf_counter()
+    indeks = main.IndeksNgram(nama)
+    print(f"Build indeks n-gram ({jumlah_obat} nama): {time.perf_counter() - mulai:.2f} s")
+
+    asli = rng.choices(nama, k=jumlah_cari)
+    query = [_salah_ketik(n, rng) for n in asli]
+    mulai = time.perf_counter()
+    hasil = [indeks.cari(q) for q in query]
+    waktu_indeks = (time.perf_counter() - mulai) / jumlah_cari
+    ketemu = sum(1 for a, h in zip(asli, hasil) if a in [k for k, _ in h])
+    print(f"IndeksNgram.cari()  : {waktu_indeks * 1e3:8.2f} ms/query, "
+          f"nama asli di top-5: {ketemu / jumlah_cari:.1%}")
+
+    mulai = time.perf_counter()
+    for q in query[:jumlah_cari_brute]:
+        sorted(nama, key=lambda k: main._jarak_edit(q, k))[:5]
+    waktu_brute = (time.perf_counter() - mulai) / jumlah_cari_brute
+    print(f"Pemindaian penuh    : {waktu_brute * 1e3:8.2f} ms/query")
+
+
+_KODE_MUAT_SNAPSHOT = """
+import json, sys, time
+import main
+mulai = time.perf_counter()
+df, root, _ = main.muat_data(sys.argv[1], sys.argv[2])
+detik = time.perf_counter() - mulai
+# VmHWM (bukan ru_maxrss, yang terbawa dari proses induk lewat exec) dalam kB.
+with open("/proc/self/status") as f:
+    status = dict(baris.split(":", 1) for baris in f)
+print(json.dumps({"detik": detik, "rss_mb": int(status["VmRSS"].split()[0]) / 1024,
+                  "puncak_mb": int(status["VmHWM"].split()[0]) / 1024}))
+"""
+
+
+def bench_snapshot(jumlah_baris=1_000_000, jumlah_obat=10_000):
+    """
+    Startup muat_data() di proses baru: dari CSV (membuat snapshot) vs dari
+    snapshot. Dilaporkan waktu, RSS setelah muat, dan puncak RSS.
+    """
+    with tempfile.TemporaryDirectory() as folder:
+        path_csv = os.path.join(folder, "pesanan.csv")
+        folder_snapshot = os.path.join(folder, "snapshot")
+        _buat_pesanan(jumlah_baris, jumlah_obat).to_csv(path_csv, index=False)
+        print(f"{jumlah_baris} baris, CSV {os.path.getsize(path_csv) / 1e6:.1f} MB")
+
+        env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.abspath(main.__file__)))
+        for sumber in ("CSV", "snapshot"):
+            keluaran = subprocess.run([sys.executable, "-c", _KODE_MUAT_SNAPSHOT, path_csv, folder_snapshot],
+                                      env=env, capture_output=True, text=True, check=True).stdout
+            hasil = json.loads(keluaran.strip().splitlines()[-1])
+            print(f"Startup dari {sumber:8s}: {hasil['detik']:8.2f} s, RSS {hasil['rss_mb']:7.1f} MB, "
+                  f"puncak {hasil['puncak_mb']:7.1f} MB")
+        ukuran = sum(os.path.getsize(os.path.join(akar, f))
+                     for akar, _, daftar in os.walk(folder_snapshot) for f in daftar)
+        print(f"Ukuran snapshot      : {ukuran / 1e6:8.1f} MB")
+
+
+def _muat_biasa(path_csv):
+    """
+    Jalur muat_data() + indeks sekunder + ringkasan tanpa snapshot, sebagai
+    pembanding; hasilnya sama dengan muat_data_bertahap().
+    """
+    df = pd.read_csv(path_csv)
+    return (df, main.bangun_bst(df), main.bangun_indeks_hash(df, 'Kategori Penyakit'),
+            main.bangun_indeks_hash(df, 'Nama Pemesan'), main.bangun_indeks_tanggal(df),
+            main.RingkasanPesanan(df))
+
+
+def bench_bertahap(jumlah_baris=1_000_000, jumlah_obat=10_000, ukuran_blok=2 << 20, jumlah_cek=200):
+    """
+    Puncak memori (tracemalloc) dan waktu: muat biasa vs muat_data_bertahap(),
+    untuk CSV dengan akhir baris LF dan CRLF (ekspor Excel/Windows).
+    """
+    data = _buat_pesanan(jumlah_baris, jumlah_obat)
+    with tempfile.TemporaryDirectory() as folder:
+        for akhir_baris in ("\n", "\r\n"):
+            path_csv = os.path.join(folder, "pesanan.csv")
+            data.to_csv(path_csv, index=False, lineterminator=akhir_baris)
+            print(f"{jumlah_baris} baris ({akhir_baris!r}), CSV {os.path.getsize(path_csv) / 1e6:.1f} MB, "
+                  f"blok {ukuran_blok >> 20} MB")
+
+            hasil = {}
+            for label, fungsi in (("biasa", _muat_biasa),
+                                  ("bertahap", lambda p: main.muat_data_bertahap(p, ukuran_blok))):
+                tracemalloc.start()
+                mulai = time.perf_counter()
+                hasil[label] = fungsi(path_csv)
+                durasi = time.perf_counter() - mulai
+                sekarang, puncak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                print(f"{label:9s}: {durasi:7.2f} s, puncak {puncak / 1e6:8.1f} MB, tersisa {sekarang / 1e6:8.1f} MB")
+
+            df_biasa, root_biasa = hasil["biasa"][:2]
+            tabel, root_bertahap = hasil["bertahap"][:2]
+            rng = random.Random(0)
+            daftar_nama = [node.nama_obat for node in main.iter_inorder(root_biasa)]
+            for nama in rng.sample(daftar_nama, min(jumlah_cek, len(daftar_nama))):
+                posisi = main.search(root_biasa, nama).data
+                assert np.array_equal(posisi, main.search(root_bertahap, nama).data), nama
+                pd.testing.assert_frame_equal(df_biasa.take(posisi).reset_index(drop=True).astype(str),
+                                              tabel.take(posisi).astype(str))
+            ringkasan_biasa, ringkasan_bertahap = hasil["biasa"][5], hasil["bertahap"][5]
+            assert ringkasan_biasa.per_bulan == ringkasan_bertahap.per_bulan
+            assert ringkasan_biasa.per_kategori == ringkasan_bertahap.per_kategori
+            print(f"Hasil pencarian identik untuk {min(jumlah_cek, len(daftar_nama))} nama obat; ringkasan identik.")
+            del hasil, df_biasa, tabel
+
+
+def _tunggu_http(url, proses, batas_waktu=300.0):
+    """Menunggu sampai `url` menjawab 200; mengembalikan False jika proses keluar lebih dulu."""
+    akhir = time.perf_counter() + batas_waktu
+    while time.perf_counter() < akhir and proses.poll() is None:
+        try:
+            with urllib.request.urlopen(url, timeout=5) as respons:
+                if respons.status == 200:
+                    return True
+        except (urllib.error.URLError, ConnectionError, OSError):
+            pass
+        time.sleep(0.05)
+    return False
+
+
+def bench_coldstart(jumlah_baris=1_000_000, jumlah_obat=10_000, port=7990):
+    """
+    Cold start per mode main.py di proses baru, tanpa dan dengan snapshot:
+    impor modul, CLI `cari`, API sampai request pertama dijawab, dan UI
+    Gradio sampai halaman pertama tersedia.
+    """
+    folder_repo = os.path.dirname(os.path.abspath(main.__file__))
+    path_main = os.path.join(folder_repo, "main.py")
+    df = _buat_pesanan(jumlah_baris, jumlah_obat)
+    nama = df['Nama Obat'].iloc[0]
+    with tempfile.TemporaryDirectory() as folder:
+        df.to_csv(os.path.join(folder, main.PATH_CSV), index=False)
+        env = dict(os.environ, PYTHONPATH=folder_repo, PORT_AWAL=str(port),
+                   GRADIO_SERVER_PORT=str(port + 1), GRADIO_ANALYTICS_ENABLED="False")
+        mode = {
+            "impor": ([sys.executable, "-c", "import main"], None),
+            "cli": ([sys.executable, path_main, "cari", nama], None),
+            "api": ([sys.executable, path_main, "api"],
+                    f"http://127.0.0.1:{port}/api/obat?nama={urllib.request.quote(nama)}&limit=1"),
+            "ui": ([sys.executable, path_main, "ui"], f"http://127.0.0.1:{port + 1}/"),
+        }
+        print(f"{jumlah_baris} baris, {jumlah_obat} obat")
+        print(f"{'mode':>6} {'tanpa snapshot (s)':>19} {'dengan snapshot (s)':>20}")
+        for label, (perintah, url) in mode.items():
+            waktu = []
+            for pakai_snapshot in (False, True):
+                if not pakai_snapshot:
+                    subprocess.run([sys.executable, "-c", "import shutil, main; shutil.rmtree(main.FOLDER_SNAPSHOT, True)"],
+                                   cwd=folder, env=env, check=True)
+                else:
+                    subprocess.run([sys.executable, "-c", "import main; main.pastikan_indeks()"],
+                                   cwd=folder, env=env, check=True, stdout=subprocess.DEVNULL)
+                mulai = time.perf_counter()
+                proses = subprocess.Popen(perintah, cwd=folder, env=env,
+                                          stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                if url is None:
+                    proses.wait()
+                    berhasil = proses.returncode == 0
+                else:
+                    berhasil = _tunggu_http(url, proses)
+                    proses.terminate()
+                    proses.wait()
+                waktu.append(f"{time.perf_counter() - mulai:.2f}" if berhasil else "gagal")
+            print(f"{label:>6} {waktu[0]:>19} {waktu[1]:>20}")
+
+
+def _pakai_data(df):
+    """Mengganti data global main.py dengan df sintetis untuk benchmark."""
+    # Tanpa membangun indeks dari PATH_CSV lebih dulu; indeks ditandai siap.
+    with main.lock_indeks.tanpa_bangun():
+        main.lock_indeks.siap = True
+        main.df = df
+        main.root = main.bangun_bst(df)
+        main.versi_indeks += 1
+
+
+def bench_batch(jumlah_nama=500, jumlah_baris=1_000_000, jumlah_obat=10_000):
+    """Membandingkan cari_obat_batch() dengan N panggilan cari_obat_gradio()."""
+    df = _buat_pesanan(jumlah_baris, jumlah_obat)
+    _pakai_data(df)
+    cache_asli = main.cache_hasil
+    main.cache_hasil = main.CacheLRU(maks_byte=0)  # ukur tanpa cache
+    nama = random.Random(2).sample(sorted(df['Nama Obat'].unique()), jumlah_nama)
+
+    try:
+        mulai = time.perf_counter()
+        for n in nama:
+            main.cari_obat_gradio(n)
+        waktu_satuan = time.perf_counter() - mulai
+
+        mulai = time.perf_counter()
+        hasil_df, _ = main.cari_obat_batch(nama)
+        waktu_batch = time.perf_counter() - mulai
+    finally:
+        main.cache_hasil = cache_asli
+
+    print(f"{jumlah_nama} nama, {len(hasil_df)} baris hasil")
+    print(f"{jumlah_nama} x cari_obat_gradio(): {waktu_satuan * 1e3:8.1f} ms")
+    print(f"cari_obat_batch()        : {waktu_batch * 1e3:8.1f} ms")
+
+
+def bench_tambah(jumlah_baris=1_000_000, jumlah_obat=10_000, ukuran_batch=10, jumlah_batch=50):
+    """Latensi tambah_pesanan() per batch kecil untuk obat terpopuler (data skew)."""
+    df = _buat_pesanan(jumlah_baris, jumlah_obat, skew=1.0)
+    _pakai_data(df)
+    with main.lock_indeks:
+        main.indeks_kategori = main.bangun_indeks_hash(df, 'Kategori Penyakit')
+        main.indeks_pemesan = main.bangun_indeks_hash(df, 'Nama Pemesan')
+        main.indeks_tanggal = main.bangun_indeks_tanggal(df)
+        main.ringkasan = main.RingkasanPesanan(df)
+    populer = df['Nama Obat'].value_counts().index[0]
+    batch = pd.DataFrame({'Nama Pemesan': ['Pemesan Baru'] * ukuran_batch,
+                          'Kategori Penyakit': ['Migrain'] * ukuran_batch,
+                          'Nama Obat': [populer] * ukuran_batch,
+                          'Tanggal Pesan': ['2025-06-01'] * ukuran_batch})
+    waktu = []
+    for _ in range(jumlah_batch):
+        mulai = time.perf_counter()
+        main.tambah_pesanan(batch)
+        waktu.append(time.perf_counter() - mulai)
+    print(f"{jumlah_baris} baris, batch {ukuran_batch} baris untuk '{populer}' "
+          f"({len(main.search(main.root, populer).data)} baris)")
+    print(f"tambah_pesanan(): median {np.median(waktu) * 1e3:.1f} ms, maks {max(waktu) * 1e3:.1f} ms")
+    # Tanggal batch digabung ke indeks terurut saat indeks tanggal dibaca berikutnya.
+    with main.lock_indeks:
+        mulai = time.perf_counter()
+        main._indeks_tanggal_terkini()
+        print(f"merge ekor tanggal ({jumlah_batch} batch) saat dibaca: {(time.perf_counter() - mulai) * 1e3:.1f} ms")
+
+
+def bench_render(jumlah_obat=100_000):
+    """Waktu visualize_bst_matplotlib() untuk pohon penuh dan terbatas kedalaman."""
+    print(f"{'n':>10} {'penuh (s)':>10} {'kedalaman<=6 (s)':>17}")
+    with tempfile.TemporaryDirectory() as folder:
+        n = 1_000
+        while n <= jumlah_obat:
+            df = pd.DataFrame({'Nama Obat': _nama_obat_terurut(n)})
+            root = main.bangun_bst(df)
+            path = os.path.join(folder, "bst.png")
+
+            mulai = time.perf_counter()
+            main.visualize_bst_matplotlib(root, filename=path)
+            waktu_penuh = time.perf_counter() - mulai
+
+            mulai = time.perf_counter()
+            main.visualize_bst_matplotlib(root, filename=path, maks_kedalaman=6)
+            waktu_terbatas = time.perf_counter() - mulai
+
+            print(f"{n:>10} {waktu_penuh:>10.2f} {waktu_terbatas:>17.2f}")
+            n *= 10
+
+
+def _latensi_cari(daftar_nama):
+    latensi = []
+    for nama in daftar_nama:
+        mulai = time.perf_counter()
+        main.cari_obat_gradio(nama)
+        latensi.append(time.perf_counter() - mulai)
+    return latensi
+
+
+def bench_beban(jumlah_request=20_000, daftar_worker=(1, 2, 4, 8), jumlah_baris=1_000_000, jumlah_obat=10_000):
+    """
+    Load test cari_obat_gradio() (cache dimatikan): p50/p99 latensi dan RPS
+    untuk thread pool dan proses hasil fork yang berbagi satu indeks.
+    """
+    df = _buat_pesanan(jumlah_baris, jumlah_obat)
+    _pakai_data(df)
+    main.cache_hasil = main.CacheLRU(maks_byte=0)
+    nama = random.Random(3).choices(sorted(df['Nama Obat'].unique()), k=jumlah_request)
+
+    print(f"{'mode':>7} {'worker':>7} {'p50 (ms)':>9} {'p99 (ms)':>9} {'RPS':>9}")
+    for mode in ("thread", "proses"):
+        if mode == "proses" and "fork" not in multiprocessing.get_all_start_methods():
+            print("proses: fork tidak tersedia, dilewati.")
+            continue
+        for jumlah_worker in daftar_worker:
+            potongan = [nama[i::jumlah_worker] for i in range(jumlah_worker)]
+            if mode == "thread":
+                pool = ThreadPoolExecutor(jumlah_worker)
+            else:
+                pool = multiprocessing.get_context("fork").Pool(jumlah_worker)
+            with pool:
+                mulai = time.perf_counter()
+                latensi = np.concatenate([np.asarray(l) for l in pool.map(_latensi_cari, potongan)])
+                waktu = time.perf_counter() - mulai
+            print(f"{mode:>7} {jumlah_worker:>7} {np.percentile(latensi, 50) * 1e3:>9.3f} "
+                  f"{np.percentile(latensi, 99) * 1e3:>9.3f} {jumlah_request / waktu:>9.0f}")
+
+
+def _persentil_us(latensi):
+    latensi = np.asarray(latensi) * 1e6
+    return {"p50_us": float(np.percentile(latensi, 50)), "p99_us": float(np.percentile(latensi, 99))}
+
+
+def _commit_git():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def bench_suite(jumlah_baris=1_000_000, jumlah_obat=10_000, skew=1.0,
+                file_output="hasil_benchmark.json", jumlah_cari=5_000):
+    """Menjalankan semua pengukuran utama dan menulis hasilnya ke JSON."""
+    hasil = {}
+    with tempfile.TemporaryDirectory() as folder:
+        path_csv = os.path.join(folder, "pesanan.csv")
+        _buat_pesanan(jumlah_baris, jumlah_obat, skew=skew).to_csv(path_csv, index=False)
+
+        mulai = time.perf_counter()
+        df = pd.read_csv(path_csv)
+        hasil["csv_load_s"] = time.perf_counter() - mulai
+
+        mulai = time.perf_counter()
+        root = main.bangun_bst(df)
+        hasil["tree_build_s"] = time.perf_counter() - mulai
+        hasil["tree_height"] = root.height
+
+        # Query mengikuti distribusi pesanan (obat populer lebih sering dicari).
+        query = df['Nama Obat'].sample(jumlah_cari, replace=True, random_state=0).tolist()
+        latensi = []
+        for nama in query:
+            mulai = time.perf_counter()
+            main.search(root, nama)
+            latensi.append(time.perf_counter() - mulai)
+        hasil["search"] = _persentil_us(latensi)
+
+        _pakai_data(df)
+        cache_asli = main.cache_hasil
+        main.cache_hasil = main.CacheLRU(maks_byte=0)
+        try:
+            latensi = []
+            for nama in query[:1_000]:
+                mulai = time.perf_counter()
+                main.cari_obat_gradio(nama)
+                latensi.append(time.perf_counter() - mulai)
+        finally:
+            main.cache_hasil = cache_asli
+        hasil["cari_obat_gradio"] = _persentil_us(latensi)
+
+        mulai = time.perf_counter()
+        main.visualize_bst_matplotlib(root, filename=os.path.join(folder, "bst.png"))
+        hasil["visualize_s"] = time.perf_counter() - mulai
+
+    laporan = {
+        "commit": _commit_git(),
+        "waktu": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "parameter": {"jumlah_baris": jumlah_baris, "jumlah_obat": jumlah_obat, "skew": skew},
+        "hasil": hasil,
+    }
+    with open(file_output, "w") as f:
+        json.dump(laporan, f, indent=2)
+    print(json.dumps(laporan, indent=2))
+    print(f"Hasil disimpan ke '{file_output}'.")
+
+
+if __name__ == "__main__":
+    perintah = sys.argv[1] if len(sys.argv) > 1 else "avl"
+    if perintah == "avl":
+        bench_avl(int(sys.argv[2]) if len(sys.argv) > 2 else 100_000)
+    elif perintah == "node":
+        bench_node(int(sys.argv[2]) if len(sys.argv) > 2 else 1_000_000)
+    elif perintah == "startup":
+        bench_startup(int(sys.argv[2]) if len(sys.argv) > 2 else 200_000)
+    elif perintah == "fuzzy":
+        bench_fuzzy(int(sys.argv[2]) if len(sys.argv) > 2 else 50_000)
+    elif perintah == "snapshot":
+        bench_snapshot(int(sys.argv[2]) if len(sys.argv) > 2 else 1_000_000)
+    elif perintah == "bertahap":
+        bench_bertahap(int(sys.argv[2]) if len(sys.argv) > 2 else 1_000_000)
+    elif perintah == "coldstart":
+        bench_coldstart(int(sys.argv[2]) if len(sys.argv) > 2 else 1_000_000)
+    elif perintah == "batch":
+        bench_batch(int(sys.argv[2]) if len(sys.argv) > 2 else 500)
+    elif perintah == "tambah":
+        bench_tambah(int(sys.argv[2]) if len(sys.argv) > 2 else 1_000_000)
+    elif perintah == "render":
+        bench_render(int(sys.argv[2]) if len(sys.argv) > 2 else 100_000)
+    elif perintah == "beban":
+        bench_beban(int(sys.argv[2]) if len(sys.argv) > 2 else 20_000)
+    elif perintah == "suite":
+        argumen = sys.argv[2:]
+        bench_suite(int(argumen[0]) if len(argumen) > 0 else 1_000_000,
+                    int(argumen[1]) if len(argumen) > 1 else 10_000,
+                    float(argumen[2]) if len(argumen) > 2 else 1.0,
+                    argumen[3] if len(argumen) > 3 else "hasil_benchmark.json")
+    else:
+        print(f"Benchmark '{perintah}' tidak dikenal.")
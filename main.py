@@ -1,294 +1,1992 @@
+import bisect
+import gc
+import hashlib
+import io
+import itertools
+import json
+import math
+import mmap
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
 import pandas as pd
-import gradio as gr
-import matplotlib.pyplot as plt # Untuk visualisasi dengan Matplotlib
 import numpy as np # Diperlukan untuk beberapa kalkulasi posisi di Matplotlib
+# gradio, fastapi, dan matplotlib diimpor saat dibutuhkan (buat_antarmuka(),
+# buat_api(), _gambar_pohon()) agar impor modul ini dan mode CLI tetap cepat.
+
+# Lokasi file CSV dan snapshot indeks (lihat muat_data())
+PATH_CSV = "Data SDA.csv"
+FOLDER_SNAPSHOT = "snapshot_obat"
+
+# Konfigurasi layanan (lihat jalankan_aplikasi())
+BATAS_KONKURENSI = int(os.environ.get("BATAS_KONKURENSI", "8"))
+JUMLAH_WORKER = int(os.environ.get("JUMLAH_WORKER", "1"))
+PORT_AWAL = int(os.environ.get("PORT_AWAL", "7860"))
+# MODE_CSV_BERTAHAP=1: CSV dibaca per blok dan baris lengkap tidak disimpan
+# di memori (lihat muat_data_bertahap()), untuk file yang lebih besar dari RAM.
+MODE_CSV_BERTAHAP = os.environ.get("MODE_CSV_BERTAHAP") == "1"
+# Hanya satu proses yang menulis ulang snapshot saat indeks dibangun ulang;
+# worker hasil fork lain memuat CSV tanpa menulis (lihat jalankan_aplikasi()).
+TULIS_SNAPSHOT = True
+
+# --- Instrumentasi (opsional) ---
+# Hot path hanya memeriksa flag METRIK_AKTIF; saat nonaktif tidak ada
+# pengukuran waktu maupun lock yang diambil. Aktifkan dengan METRIK_AKTIF=1
+# atau aktifkan_metrik().
+METRIK_AKTIF = os.environ.get("METRIK_AKTIF") == "1"
+
+class Metrik:
+    """Counter dan histogram latensi (bucket pangkat dua dalam mikrodetik)."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counter = Counter()
+        self.histogram = {}
+        self.total_detik = Counter()
+
+    def catat(self, nama, detik):
+        bucket = 1 << int(detik * 1e6).bit_length()
+        with self._lock:
+            self.counter[nama] += 1
+            self.total_detik[nama] += detik
+            self.histogram.setdefault(nama, Counter())[bucket] += 1
+
+    def tambah(self, nama, jumlah=1):
+        with self._lock:
+            self.counter[nama] += jumlah
+
+    def ringkasan(self):
+        with self._lock:
+            return {
+                "counter": dict(self.counter),
+                "rata_rata_us": {nama: self.total_detik[nama] / self.counter[nama] * 1e6
+                                 for nama in self.total_detik if self.counter[nama]},
+                # Kunci: batas atas bucket (us), nilai: jumlah kejadian.
+                "histogram_us": {nama: {f"<{b}": n for b, n in sorted(h.items())}
+                                 for nama, h in self.histogram.items()},
+            }
+
+metrik = Metrik()
 
-# Baca file CSV
-try:
-    df = pd.read_csv("Data SDA.csv")
-except FileNotFoundError:
-    print("Error: File 'Data SDA.csv' tidak ditemukan. Pastikan file tersebut ada di direktori yang sama.")
-    df = pd.DataFrame(columns=['Nama Obat', 'Nama Pemesan', 'Kategori Penyakit', 'Tanggal Pesan'])
+def aktifkan_metrik(aktif=True):
+    global METRIK_AKTIF
+    METRIK_AKTIF = bool(aktif)
 
 # Kelas Node BST
 class Node:
+    # Tanpa __dict__ per instance; posisi x/y untuk Matplotlib disimpan
+    # terpisah oleh _hitung_layout(), bukan di node.
+    __slots__ = ("nama_obat", "data", "left", "right", "height")
+
     def __init__(self, nama_obat):
-        self.nama_obat = nama_obat
-        self.data = []
+        # str() juga mengubah numpy.str_ (kunci dari snapshot) menjadi str biasa.
+        self.nama_obat = sys.intern(str(nama_obat))
+        # Offset baris pada DataFrame `df` (bukan salinan dict per baris);
+        # selalu diisi oleh pembuat node.
+        self.data = None
         self.left = None
         self.right = None
-        # Atribut untuk Matplotlib (posisi x, y)
-        self.x = 0
-        self.y = 0
+        self.height = 1
+
+# --- Penyeimbangan AVL ---
+# Data ekspor harian biasanya sudah terurut berdasarkan 'Nama Obat'. Tanpa
+# penyeimbangan, pohon akan berubah menjadi linked list (pencarian O(n) dan
+# insert rekursif melewati batas rekursi Python). Rotasi AVL menjaga tinggi
+# pohon tetap O(log n).
+def _tinggi(node):
+    return node.height if node else 0
+
+def _perbarui_tinggi(node):
+    node.height = 1 + max(_tinggi(node.left), _tinggi(node.right))
+
+def _rotasi_kanan(y):
+    x = y.left
+    y.left = x.right
+    x.right = y
+    _perbarui_tinggi(y)
+    _perbarui_tinggi(x)
+    return x
+
+def _rotasi_kiri(x):
+    y = x.right
+    x.right = y.left
+    y.left = x
+    _perbarui_tinggi(x)
+    _perbarui_tinggi(y)
+    return y
+
+def _seimbangkan(node):
+    """Memperbarui tinggi node lalu melakukan rotasi AVL bila diperlukan."""
+    _perbarui_tinggi(node)
+    faktor = _tinggi(node.left) - _tinggi(node.right)
+    if faktor > 1:
+        if _tinggi(node.left.left) < _tinggi(node.left.right):
+            node.left = _rotasi_kiri(node.left)
+        return _rotasi_kanan(node)
+    if faktor < -1:
+        if _tinggi(node.right.right) < _tinggi(node.right.left):
+            node.right = _rotasi_kanan(node.right)
+        return _rotasi_kiri(node)
+    return node
 
 # Fungsi untuk memasukkan data ke BST
-def insert(root, row):
+# `row` cukup berisi 'Nama Obat'; yang disimpan di node hanya `posisi`,
+# yaitu offset baris tersebut pada DataFrame `df`.
+def insert(root, row, posisi):
     nama_obat_key = str(row['Nama Obat']).strip().lower()
     if not nama_obat_key:
         return root
+    if not METRIK_AKTIF:
+        return _insert(root, nama_obat_key, posisi)
+    mulai = time.perf_counter()
+    root = _insert(root, nama_obat_key, posisi)
+    metrik.catat("insert", time.perf_counter() - mulai)
+    return root
+
+class _OffsetTumbuh(np.ndarray):
+    """Penanda buffer offset milik satu node/posting yang punya kapasitas cadangan."""
 
+def _tambah_offset(data, posisi):
+    """
+    Mengembalikan data + posisi sebagai view atas buffer _OffsetTumbuh milik
+    sendiri dengan kapasitas dua kali lipat, sehingga tambahan berikutnya
+    cukup menulis `posisi` ke sisa kapasitas (amortized O(k)), bukan menyalin
+    seluruh array. Isi data[0:len(data)] tidak pernah ditulis ulang, jadi view
+    lama yang masih dipegang pembaca tetap sama. View dari bulk load (berbagi
+    satu array `baris`, bisa read-only dari snapshot) selalu disalin dulu.
+    """
+    posisi = np.array(posisi, dtype=np.int64, ndmin=1)
+    n, k = len(data), len(posisi)
+    buffer = data.base
+    if not (isinstance(buffer, _OffsetTumbuh) and len(buffer) >= n + k
+            and data.ctypes.data == buffer.ctypes.data):
+        buffer = np.empty(max(2 * (n + k), 16), dtype=np.int64).view(_OffsetTumbuh)
+        buffer[:n] = data
+    buffer[n:n + k] = posisi
+    return buffer[:n + k]
+
+def _insert(root, nama_obat_key, posisi):
+    # `posisi` boleh satu offset atau array offset (satu grup per batch).
     if root is None:
         node = Node(nama_obat_key)
-        node.data.append(row.to_dict() if isinstance(row, pd.Series) else row)
+        node.data = np.array(posisi, dtype=np.int64, ndmin=1)
         return node
     
     if nama_obat_key < root.nama_obat:
-        root.left = insert(root.left, row)
+        root.left = _insert(root.left, nama_obat_key, posisi)
     elif nama_obat_key > root.nama_obat:
-        root.right = insert(root.right, row)
+        root.right = _insert(root.right, nama_obat_key, posisi)
     else:
-        root.data.append(row.to_dict() if isinstance(row, pd.Series) else row)
-    return root
+        root.data = _tambah_offset(root.data, posisi)
+        return root
+    return _seimbangkan(root)
+
+# --- Bulk load: bangun BST seimbang langsung dari DataFrame ---
+def _bangun_dari_terurut(kunci, batas, baris, kiri, kanan):
+    """Membangun subtree seimbang dari kunci unik terurut kunci[kiri:kanan]."""
+    if kiri >= kanan:
+        return None
+    tengah = (kiri + kanan) // 2
+    node = Node(kunci[tengah])
+    # Slice numpy adalah view: semua node berbagi satu array offset.
+    node.data = baris[batas[tengah]:batas[tengah + 1]]
+    node.left = _bangun_dari_terurut(kunci, batas, baris, kiri, tengah)
+    node.right = _bangun_dari_terurut(kunci, batas, baris, tengah + 1, kanan)
+    _perbarui_tinggi(node)
+    return node
+
+def _kunci_terurut(df):
+    """
+    Mengembalikan (kunci_unik, batas, baris): kunci 'Nama Obat' unik terurut,
+    tabel offset grup (grup ke-i adalah baris[batas[i]:batas[i + 1]]), dan
+    offset baris di `df` yang sudah diurutkan berdasarkan kunci.
+    """
+    kosong = (np.empty(0, dtype=object), np.zeros(1, dtype=np.int64), np.empty(0, dtype=np.int64))
+    if df.empty or 'Nama Obat' not in df.columns:
+        return kosong
+
+    kunci = df['Nama Obat'].astype("string").str.strip().str.lower()
+    posisi = np.flatnonzero((kunci.notna() & (kunci != "")).to_numpy())
+    if len(posisi) == 0:
+        return kosong
+    kunci_valid = kunci.to_numpy(dtype=object)[posisi]
+    urutan = np.argsort(kunci_valid, kind='stable')
+    kunci_terurut = kunci_valid[urutan]
+
+    # Indeks awal setiap grup kunci yang sama, ditambah batas akhir.
+    batas = np.flatnonzero(kunci_terurut[1:] != kunci_terurut[:-1]) + 1
+    batas = np.concatenate(([0], batas, [len(kunci_terurut)]))
+    kunci_unik = kunci_terurut[batas[:-1]]
+
+    return kunci_unik, batas.astype(np.int64), posisi[urutan].astype(np.int64)
+
+def bangun_bst(df):
+    """
+    Membangun BST dari seluruh DataFrame sekaligus, tanpa iterrows().
+    'Nama Obat' dinormalisasi dengan operasi string vektor, baris diurutkan
+    satu kali (stabil, sehingga urutan data per obat sama dengan urutan CSV),
+    lalu pohon seimbang dibentuk langsung dari daftar kunci unik terurut.
+    Setiap node hanya menyimpan offset baris; data lengkap tetap di `df`.
+    """
+    kunci_unik, batas, baris = _kunci_terurut(df)
+    return _bangun_dari_terurut(kunci_unik, batas, baris, 0, len(kunci_unik))
+
+# --- Snapshot indeks: file .npy yang bisa di-memory-map ---
+# Isi snapshot: setiap kolom teks df di-dictionary-encode, yaitu kode integer
+# per baris (kolom_i.npy, -1 untuk nilai kosong) dan nilai unik sebagai byte
+# UTF-8 berurutan dengan array offset (kolom_i_nilai.bin/_offset.npy);
+# kolom numerik disimpan apa adanya. Ditambah kunci_unik/batas/baris dari
+# _kunci_terurut(). Saat startup, array kode dan offset baris dibuka dengan
+# mmap dan dipakai langsung (kolom Categorical), sehingga tidak perlu parsing
+# CSV maupun sorting ulang; hanya nilai unik yang di-decode.
+# meta.json mencatat mtime, ukuran, dan SHA-256 CSV sumber, serta subfolder
+# (isi-*) tempat file snapshot itu berada. Setiap rebuild menulis ke subfolder
+# baru dan file yang sudah ditulis tidak pernah ditimpa, sehingga proses lain
+# yang masih me-mmap snapshot lama tetap membaca inode lamanya (tidak SIGBUS
+# dan tidak tercampur data baru) sampai ia memuat ulang sendiri.
+VERSI_SNAPSHOT = 3
+
+def _hash_file(path, ukuran_blok=1 << 20):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for blok in iter(lambda: f.read(ukuran_blok), b""):
+            h.update(blok)
+    return h.hexdigest()
+
+def _simpan_teks(path, daftar_teks):
+    """Menyimpan daftar str sebagai byte UTF-8 (path.bin) dan offset (path_offset.npy)."""
+    data = [teks.encode("utf-8") for teks in daftar_teks]
+    offset = np.zeros(len(data) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in data], out=offset[1:])
+    with open(path + ".bin", "wb") as f:
+        f.write(b"".join(data))
+    np.save(path + "_offset.npy", offset)
+
+def _muat_teks(path):
+    with open(path + ".bin", "rb") as f:
+        data = f.read()
+    offset = np.load(path + "_offset.npy").tolist()
+    return [data[a:b].decode("utf-8") for a, b in zip(offset, offset[1:])]
+
+def _tulis_meta(path_meta, meta):
+    # Nama sementara unik per proses/thread: penulis bersamaan tidak saling timpa.
+    sementara = f"{path_meta}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(sementara, "w") as f:
+        json.dump(meta, f)
+    os.replace(sementara, path_meta)
+
+def simpan_snapshot(df, kunci_unik, batas, baris, path_csv=PATH_CSV, folder=FOLDER_SNAPSHOT, sumber=None):
+    # `sumber`: (mtime, ukuran, sha256) byte CSV yang benar-benar di-parse
+    # menjadi `df`; default dihitung dari file saat ini.
+    os.makedirs(folder, exist_ok=True)
+    path_meta = os.path.join(folder, "meta.json")
+    # Snapshot lama dinyatakan tidak valid sebelum apa pun ditulis.
+    try:
+        os.remove(path_meta)
+    except FileNotFoundError:
+        pass
+    isi = tempfile.mkdtemp(prefix="isi-", dir=folder)
+    format_kolom = []
+    for i, kol in enumerate(df.columns):
+        path = os.path.join(isi, f"kolom_{i}")
+        if pd.api.types.is_numeric_dtype(df[kol]):
+            np.save(path + ".npy", df[kol].to_numpy())
+            format_kolom.append("numerik")
+            continue
+        # NaN tetap NaN (kode -1), bukan string kosong.
+        kode, nilai_unik = pd.factorize(df[kol])
+        # Lebar kode mengikuti Categorical agar from_codes() tidak menyalin array.
+        kode = pd.Categorical.from_codes(kode, categories=nilai_unik).codes
+        np.save(path + ".npy", kode)
+        _simpan_teks(path + "_nilai", [str(v) for v in nilai_unik])
+        format_kolom.append("kategori")
+    _simpan_teks(os.path.join(isi, "kunci"), [str(k) for k in kunci_unik])
+    np.save(os.path.join(isi, "batas.npy"), batas)
+    np.save(os.path.join(isi, "baris.npy"), baris)
+
+    if sumber is None:
+        stat = os.stat(path_csv)
+        sumber = (stat.st_mtime, stat.st_size, _hash_file(path_csv))
+    meta = {
+        "versi": VERSI_SNAPSHOT,
+        "kolom": list(df.columns),
+        "format_kolom": format_kolom,
+        "csv_mtime": sumber[0],
+        "csv_size": sumber[1],
+        "csv_sha256": sumber[2],
+        "isi": os.path.basename(isi),
+    }
+    # meta.json ditulis terakhir secara atomik: snapshot yang setengah jadi
+    # tidak akan pernah dianggap valid.
+    _tulis_meta(path_meta, meta)
+
+    # Subfolder lama dihapus; mapping yang masih terbuka di proses lain tetap
+    # valid karena inode-nya baru dilepas setelah mapping terakhir ditutup.
+    for nama in os.listdir(folder):
+        if nama.startswith("isi-") and nama != meta["isi"]:
+            shutil.rmtree(os.path.join(folder, nama), ignore_errors=True)
+        elif nama.endswith((".npy", ".bin")):
+            # Sisa snapshot versi 2 (file langsung di folder).
+            os.remove(os.path.join(folder, nama))
+
+def muat_snapshot(path_csv=PATH_CSV, folder=FOLDER_SNAPSHOT):
+    """
+    Mengembalikan (df, kunci_unik, batas, baris, ukuran_csv) dari snapshot,
+    atau None jika snapshot tidak ada atau CSV sudah berubah. Hash CSV hanya dihitung ulang
+    bila mtime/ukurannya berbeda dari yang tercatat.
+    """
+    path_meta = os.path.join(folder, "meta.json")
+    try:
+        with open(path_meta) as f:
+            meta = json.load(f)
+        stat = os.stat(path_csv)
+    except (OSError, ValueError):
+        return None
+    if meta.get("versi") != VERSI_SNAPSHOT:
+        return None
+
+    if (meta["csv_mtime"], meta["csv_size"]) != (stat.st_mtime, stat.st_size):
+        if meta["csv_size"] != stat.st_size or meta["csv_sha256"] != _hash_file(path_csv):
+            return None
+        # Isi sama, hanya mtime yang berubah (mis. file disalin ulang).
+        meta["csv_mtime"] = stat.st_mtime
+        _tulis_meta(path_meta, meta)
+
+    isi = os.path.join(folder, meta["isi"])
+
+    def muat(nama):
+        return np.load(os.path.join(isi, nama), mmap_mode='r')
+
+    try:
+        kolom = {}
+        for i, (kol, format_) in enumerate(zip(meta["kolom"], meta["format_kolom"])):
+            if format_ == "numerik":
+                kolom[kol] = muat(f"kolom_{i}.npy")
+            else:
+                nilai_unik = pd.Index(_muat_teks(os.path.join(isi, f"kolom_{i}_nilai")))
+                kolom[kol] = pd.Categorical.from_codes(muat(f"kolom_{i}.npy"), dtype=pd.CategoricalDtype(nilai_unik))
+        kunci_unik = _muat_teks(os.path.join(isi, "kunci"))
+        batas, baris = muat("batas.npy"), muat("baris.npy")
+    except OSError:
+        # Subfolder sudah diganti snapshot baru oleh proses lain saat dimuat.
+        return None
+    # copy=False: kolom tetap menunjuk ke array kode yang di-mmap.
+    df = pd.DataFrame(kolom, copy=False)
+    return df, kunci_unik, batas, baris, meta["csv_size"]
+
+def muat_data(path_csv=PATH_CSV, folder_snapshot=FOLDER_SNAPSHOT, tulis_snapshot=True):
+    """
+    Memuat DataFrame pesanan dan membangun BST obat. Snapshot dipakai bila
+    masih cocok dengan CSV; jika tidak, CSV dibaca lalu snapshot dibuat ulang
+    (kecuali `tulis_snapshot` False).
+    Mengembalikan (df, root, ukuran_csv), dengan ukuran_csv jumlah byte CSV
+    yang termuat (0 jika file tidak ada); PengawasCSV mulai dari sana.
+    """
+    mulai = time.perf_counter()
+    snapshot = muat_snapshot(path_csv, folder_snapshot)
+    if snapshot is not None:
+        df, kunci_unik, batas, baris, ukuran_csv = snapshot
+        sumber = "snapshot"
+    else:
+        try:
+            # Byte dibaca sekali lalu di-parse, sehingga ukuran dan hash yang
+            # dicatat persis sama dengan isi df walau file sedang ditambah.
+            with open(path_csv, "rb") as f:
+                stat = os.fstat(f.fileno())
+                isi = f.read(stat.st_size)
+            df = pd.read_csv(io.BytesIO(isi))
+            ukuran_csv = len(isi)
+        except FileNotFoundError:
+            print(f"Error: File '{path_csv}' tidak ditemukan. Pastikan file tersebut ada di direktori yang sama.")
+            df = pd.DataFrame(columns=['Nama Obat', 'Nama Pemesan', 'Kategori Penyakit', 'Tanggal Pesan'])
+            ukuran_csv = 0
+        kunci_unik, batas, baris = _kunci_terurut(df)
+        if tulis_snapshot and not df.empty:
+            try:
+                simpan_snapshot(df, kunci_unik, batas, baris, path_csv, folder_snapshot,
+                                sumber=(stat.st_mtime, ukuran_csv, hashlib.sha256(isi).hexdigest()))
+            except OSError as e:
+                print(f"Peringatan: snapshot indeks tidak dapat disimpan ({e}).")
+        sumber = "CSV"
+
+    root = _bangun_dari_terurut(kunci_unik, batas, baris, 0, len(kunci_unik))
+    print(f"Data dan indeks obat dimuat dari {sumber} dalam {time.perf_counter() - mulai:.2f} detik.")
+    return df, root, ukuran_csv
 
 # Fungsi untuk mencari data di BST
 def search(root, nama_obat):
     nama_obat_key = str(nama_obat).strip().lower()
     if not nama_obat_key:
         return None
-        
+    # Flag dibaca sekali: aktifkan_metrik() bisa mengubahnya di tengah panggilan.
+    ukur = METRIK_AKTIF
+    if ukur:
+        mulai = time.perf_counter()
+    current = _cari_node(root, nama_obat_key)
+    if ukur:
+        metrik.catat("search", time.perf_counter() - mulai)
+    return current
+
+def _cari_node(root, nama_obat_key):
+    """Pencarian kunci yang sudah dinormalisasi, tanpa metrik."""
     current = root
-    while current is not None:
+    while current is not None and nama_obat_key != current.nama_obat:
         if nama_obat_key < current.nama_obat:
             current = current.left
-        elif nama_obat_key > current.nama_obat:
+        else:
             current = current.right
+    return current
+
+# Laporan kesehatan indeks
+def statistik_indeks():
+    """
+    Ringkasan kondisi BST: tinggi dibanding tinggi ideal log2(n), sebaran
+    jumlah baris per node (skew kunci), dan perkiraan memori per node.
+    """
+    with lock_indeks:
+        nodes = list(iter_inorder(root))
+        tinggi = root.height if root else 0
+    if not nodes:
+        return {"jumlah_node": 0}
+
+    baris_per_node = np.array([len(node.data) for node in nodes])
+    memori = np.array([sys.getsizeof(node) + sys.getsizeof(node.nama_obat)
+                       + sys.getsizeof(node.data) + (node.data.nbytes if node.data.base is not None else 0)
+                       for node in nodes])
+    teratas = np.sort(baris_per_node)[::-1][:max(1, len(nodes) // 100)]
+    tinggi_ideal = math.ceil(math.log2(len(nodes) + 1))
+    return {
+        "jumlah_node": len(nodes),
+        "jumlah_baris": int(baris_per_node.sum()),
+        "tinggi": tinggi,
+        "tinggi_ideal": tinggi_ideal,
+        "rasio_tinggi": tinggi / tinggi_ideal,
+        "baris_per_node": {
+            "min": int(baris_per_node.min()),
+            "median": float(np.median(baris_per_node)),
+            "rata_rata": float(baris_per_node.mean()),
+            "p99": float(np.percentile(baris_per_node, 99)),
+            "maks": int(baris_per_node.max()),
+        },
+        # Porsi baris yang dimiliki 1% kunci terpopuler (1% = seragam).
+        "porsi_baris_top_1_persen": float(teratas.sum() / baris_per_node.sum()),
+        "memori_per_node_byte": float(memori.mean()),
+    }
+
+# Fungsi untuk mencari banyak nama obat sekaligus
+def search_batch(root, daftar_nama_obat):
+    """
+    Mencari banyak nama obat dalam satu traversal gabungan: nama diurutkan,
+    lalu di setiap node daftar nama dibagi (bisect) menjadi bagian kiri dan
+    kanan, sehingga subtree yang tidak berisi nama dicari tidak dikunjungi.
+    Mengembalikan dict {nama_obat_key: Node} untuk nama yang ditemukan.
+    """
+    kunci = sorted({str(nama).strip().lower() for nama in daftar_nama_obat} - {""})
+    hasil = {}
+    stack = [(root, 0, len(kunci))]
+    while stack:
+        node, kiri, kanan = stack.pop()
+        if node is None or kiri >= kanan:
+            continue
+        tengah = bisect.bisect_left(kunci, node.nama_obat, kiri, kanan)
+        awal_kanan = tengah
+        if tengah < kanan and kunci[tengah] == node.nama_obat:
+            hasil[node.nama_obat] = node
+            awal_kanan = tengah + 1
+        stack.append((node.right, awal_kanan, kanan))
+        stack.append((node.left, kiri, tengah))
+    return hasil
+
+# Fungsi untuk pencarian berdasarkan awalan nama obat (autocomplete)
+def cari_prefix(root, prefix, batas=10):
+    """
+    Mengembalikan maksimal `batas` node yang nama obatnya diawali `prefix`,
+    terurut naik. Traversal in-order iteratif yang hanya turun ke cabang yang
+    mungkin berisi kunci >= prefix, lalu berhenti pada kunci pertama yang
+    tidak lagi diawali prefix, sehingga biayanya O(log n + batas).
+    """
+    prefix = str(prefix).strip().lower()
+    if not prefix:
+        return []
+
+    hasil = []
+    stack = []
+    current = root
+    while (stack or current is not None) and len(hasil) < batas:
+        if current is not None:
+            if current.nama_obat >= prefix:
+                stack.append(current)
+                current = current.left
+            else:
+                # Seluruh subtree kiri juga < prefix.
+                current = current.right
         else:
-            return current
+            node = stack.pop()
+            if not node.nama_obat.startswith(prefix):
+                break
+            hasil.append(node)
+            current = node.right
+    return hasil
+
+# Traversal in-order iteratif (tanpa batas rekursi), terurut naik
+def iter_inorder(root):
+    stack = []
+    current = root
+    while stack or current is not None:
+        while current is not None:
+            stack.append(current)
+            current = current.left
+        node = stack.pop()
+        yield node
+        current = node.right
+
+# --- Pencarian fuzzy (toleran salah ketik) dengan indeks n-gram ---
+def _jarak_edit(a, b):
+    """Jarak Levenshtein antara dua string."""
+    if len(a) < len(b):
+        a, b = b, a
+    baris_sebelumnya = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        baris = [i]
+        for j, cb in enumerate(b, 1):
+            baris.append(min(baris_sebelumnya[j] + 1,
+                             baris[j - 1] + 1,
+                             baris_sebelumnya[j - 1] + (ca != cb)))
+        baris_sebelumnya = baris
+    return baris_sebelumnya[-1]
+
+class IndeksNgram:
+    """
+    Indeks n-gram karakter atas nama obat. Kandidat dipilih dari jumlah n-gram
+    yang sama dengan query (tanpa memindai seluruh kunci), lalu hanya
+    `maks_kandidat` teratas yang diurutkan ulang dengan jarak edit.
+    """
+    def __init__(self, daftar_kunci, n=3):
+        self.n = n
+        self.kunci = []
+        self.posting = {}
+        for kunci in daftar_kunci:
+            self.tambah(kunci)
+
+    def _ngram(self, teks):
+        teks = " " * (self.n - 1) + teks + " "
+        return {teks[i:i + self.n] for i in range(len(teks) - self.n + 1)}
+
+    def tambah(self, kunci):
+        idx = len(self.kunci)
+        self.kunci.append(kunci)
+        for gram in self._ngram(kunci):
+            self.posting.setdefault(gram, []).append(idx)
+
+    def cari(self, teks, batas=5, maks_kandidat=50, min_skor=0.6):
+        """Mengembalikan daftar (kunci, skor) terurut dari yang paling mirip."""
+        teks = str(teks).strip().lower()
+        if not teks:
+            return []
+
+        hitung = Counter()
+        for gram in self._ngram(teks):
+            hitung.update(self.posting.get(gram, ()))
+
+        hasil = []
+        for idx, _ in hitung.most_common(maks_kandidat):
+            kunci = self.kunci[idx]
+            skor = 1 - _jarak_edit(teks, kunci) / max(len(teks), len(kunci))
+            if skor >= min_skor:
+                hasil.append((kunci, skor))
+        hasil.sort(key=lambda item: (-item[1], item[0]))
+        return hasil[:batas]
+
+# --- Indeks sekunder: Kategori Penyakit, Nama Pemesan, Tanggal Pesan ---
+def bangun_indeks_hash(df, kolom):
+    """Hash index: nilai kolom (lowercase) -> array offset baris di `df`."""
+    if df.empty or kolom not in df.columns:
+        return {}
+    kunci = df[kolom].astype("string").str.strip().str.lower()
+    return {k: v.astype(np.int64) for k, v in kunci.groupby(kunci, sort=False).indices.items() if k}
+
+def cari_hash(indeks, nilai):
+    return indeks.get(str(nilai).strip().lower(), np.empty(0, dtype=np.int64))
+
+def bangun_indeks_tanggal(df):
+    """Indeks terurut: (tanggal terurut, offset baris) untuk query rentang."""
+    if df.empty or 'Tanggal Pesan' not in df.columns:
+        return np.empty(0, dtype='datetime64[ns]'), np.empty(0, dtype=np.int64)
+    tanggal = pd.to_datetime(df['Tanggal Pesan'], errors='coerce').to_numpy(dtype='datetime64[ns]')
+    posisi = np.flatnonzero(~np.isnat(tanggal))
+    urutan = np.argsort(tanggal[posisi], kind='stable')
+    return tanggal[posisi][urutan], posisi[urutan].astype(np.int64)
+
+def _indeks_tanggal_terkini():
+    """
+    indeks_tanggal setelah ekor dari tambah_pesanan() digabung (satu merge
+    untuk semua batch tertunda). Dipanggil di bawah lock_indeks.
+    """
+    global indeks_tanggal
+    if _ekor_tanggal:
+        tanggal_baru = np.concatenate([t for t, _ in _ekor_tanggal])
+        baris_baru = np.concatenate([b for _, b in _ekor_tanggal])
+        # Stabil: tanggal yang sama tetap berurutan sesuai batch masuknya.
+        urutan = np.argsort(tanggal_baru, kind='stable')
+        tanggal, baris = indeks_tanggal
+        letak = np.searchsorted(tanggal, tanggal_baru[urutan], side='right')
+        indeks_tanggal = (np.insert(tanggal, letak, tanggal_baru[urutan]),
+                          np.insert(baris, letak, baris_baru[urutan]))
+        _ekor_tanggal.clear()
+    return indeks_tanggal
+
+def cari_rentang_tanggal(indeks, awal, akhir):
+    """
+    Offset baris dengan awal <= Tanggal Pesan <= akhir (binary search).
+    `awal` atau `akhir` yang kosong berarti rentang tidak dibatasi di sisi itu.
+    """
+    tanggal_terurut, baris = indeks
+    kiri, kanan = 0, len(tanggal_terurut)
+    if awal:
+        kiri = np.searchsorted(tanggal_terurut, np.datetime64(pd.Timestamp(awal), 'ns'), side='left')
+    if akhir:
+        kanan = np.searchsorted(tanggal_terurut, np.datetime64(pd.Timestamp(akhir), 'ns'), side='right')
+    return baris[kiri:kanan]
+
+# --- Ringkasan agregat untuk analitik ---
+class RingkasanPesanan:
+    """
+    Ringkasan yang dihitung sekali saat indeks dibangun lalu diperbarui per
+    batch pesanan baru, sehingga query analitik tidak memindai ulang baris:
+      per_bulan[obat]["YYYY-MM"]   -> jumlah pesanan obat pada bulan itu
+      per_kategori[kategori][obat] -> jumlah pesanan obat untuk kategori itu
+    Kunci dinormalisasi seperti indeks lain (strip + lowercase).
+    """
+    def __init__(self, df=None):
+        self.per_bulan = {}
+        self.per_kategori = {}
+        # Urutan obat per kategori (jumlah menurun), dihitung saat pertama diminta.
+        self._urutan_kategori = {}
+        if df is not None:
+            self.tambah(df)
+
+    def tambah(self, df):
+        if df.empty or 'Nama Obat' not in df.columns:
+            return
+        kunci = pd.DataFrame({'obat': df['Nama Obat'].astype("string").str.strip().str.lower()})
+        if 'Kategori Penyakit' in df.columns:
+            kunci['kategori'] = df['Kategori Penyakit'].astype("string").str.strip().str.lower()
+        if 'Tanggal Pesan' in df.columns:
+            tanggal = pd.to_datetime(df['Tanggal Pesan'], errors='coerce')
+            kunci['bulan'] = tanggal.dt.year * 100 + tanggal.dt.month
+        kunci = kunci[kunci['obat'].notna() & (kunci['obat'] != "")]
+
+        if 'bulan' in kunci.columns:
+            hitung = kunci.groupby(['obat', 'bulan']).size()
+            daftar_obat = hitung.index.get_level_values(0).tolist()
+            daftar_bulan = hitung.index.get_level_values(1).tolist()
+            # Label "YYYY-MM" dibentuk sekali per bulan unik, bukan per pasangan.
+            label = {b: f"{int(b) // 100:04d}-{int(b) % 100:02d}" for b in set(daftar_bulan)}
+            for obat, bulan, jumlah in zip(daftar_obat, daftar_bulan, hitung.tolist()):
+                histogram = self.per_bulan.setdefault(obat, {})
+                histogram[label[bulan]] = histogram.get(label[bulan], 0) + jumlah
+        if 'kategori' in kunci.columns:
+            kunci = kunci[kunci['kategori'] != ""]
+            hitung = kunci.groupby(['kategori', 'obat']).size()
+            for kategori, obat, jumlah in zip(hitung.index.get_level_values(0).tolist(),
+                                              hitung.index.get_level_values(1).tolist(), hitung.tolist()):
+                hitungan = self.per_kategori.setdefault(kategori, {})
+                hitungan[obat] = hitungan.get(obat, 0) + jumlah
+                self._urutan_kategori.pop(kategori, None)
+
+    def gabung(self, lain):
+        """Menambahkan hitungan dari ringkasan lain (mis. ringkasan satu batch)."""
+        for obat, histogram_lain in lain.per_bulan.items():
+            histogram = self.per_bulan.setdefault(obat, {})
+            for bulan, jumlah in histogram_lain.items():
+                histogram[bulan] = histogram.get(bulan, 0) + jumlah
+        for kategori, hitungan_lain in lain.per_kategori.items():
+            hitungan = self.per_kategori.setdefault(kategori, {})
+            for obat, jumlah in hitungan_lain.items():
+                hitungan[obat] = hitungan.get(obat, 0) + jumlah
+            self._urutan_kategori.pop(kategori, None)
+
+    def per_bulan_obat(self, nama_obat):
+        """{"YYYY-MM": jumlah} terurut per bulan untuk satu obat."""
+        return dict(sorted(self.per_bulan.get(str(nama_obat).strip().lower(), {}).items()))
+
+    def obat_teratas(self, kategori, n=10):
+        """[(obat, jumlah), ...] sebanyak `n` obat terbanyak untuk satu kategori."""
+        kategori = str(kategori).strip().lower()
+        urutan = self._urutan_kategori.get(kategori)
+        if urutan is None:
+            urutan = sorted(self.per_kategori.get(kategori, {}).items(), key=lambda kv: (-kv[1], kv[0]))
+            self._urutan_kategori[kategori] = urutan
+        return urutan[:n]
+
+# --- Ingestion CSV bertahap untuk file yang lebih besar dari RAM ---
+class TabelBertambah:
+    """
+    Tabel pesanan = data dasar yang tidak berubah + ekor berisi batch dari
+    tambah_pesanan(). Batch baru hanya ditambahkan ke daftar ekor (O(k) untuk
+    k baris), bukan menyalin seluruh tabel. take() membagi posisi ke dasar dan
+    ekor. Subkelas menyediakan _jumlah_dasar() dan _ambil_dasar().
+    """
+    def __init__(self, kolom):
+        self.columns = pd.Index(kolom)
+        self._ekor = []
+        self._jumlah_ekor = 0
+
+    def __len__(self):
+        return self._jumlah_dasar() + self._jumlah_ekor
+
+    @property
+    def empty(self):
+        return len(self) == 0
+
+    def tambah(self, baru):
+        self._ekor.append(baru.reindex(columns=self.columns).reset_index(drop=True))
+        self._jumlah_ekor += len(baru)
+
+    def _ambil_ekor(self, posisi):
+        if len(self._ekor) > 1:
+            # Batch digabung saat pertama dibaca, bukan setiap kali ditulis.
+            self._ekor = [pd.concat(self._ekor, ignore_index=True)]
+        return self._ekor[0].take(posisi)
+
+    def take(self, posisi):
+        posisi = np.asarray(posisi, dtype=np.int64)
+        jumlah_dasar = self._jumlah_dasar()
+        dari_dasar = posisi < jumlah_dasar
+        if dari_dasar.all():
+            return self._ambil_dasar(posisi)
+        if not dari_dasar.any():
+            return self._ambil_ekor(posisi - jumlah_dasar).reset_index(drop=True)
+        hasil = pd.concat([self._ambil_dasar(posisi[dari_dasar]),
+                           self._ambil_ekor(posisi[~dari_dasar] - jumlah_dasar)], ignore_index=True)
+        # Kembalikan ke urutan `posisi` semula.
+        urutan = np.concatenate((np.flatnonzero(dari_dasar), np.flatnonzero(~dari_dasar)))
+        return hasil.take(np.argsort(urutan, kind='stable')).reset_index(drop=True)
+
+class TabelMemori(TabelBertambah):
+    """`df` setelah pesanan pertama ditambahkan: DataFrame dasar (termasuk yang di-mmap dari snapshot) + ekor."""
+    def __init__(self, dasar):
+        super().__init__(dasar.columns)
+        self.dasar = dasar
+
+    def _jumlah_dasar(self):
+        return len(self.dasar)
+
+    def _ambil_dasar(self, posisi):
+        return self.dasar.take(posisi)
+
+class TabelCSV(TabelBertambah):
+    """
+    Pengganti DataFrame `df` untuk mode bertahap. Yang disimpan di memori
+    hanya offset byte awal setiap baris CSV; take() membaca baris yang
+    diminta langsung dari file.
+    """
+    def __init__(self, path_csv, kolom, offset_baris):
+        super().__init__(kolom)
+        self.path_csv = path_csv
+        # offset_baris[i]..offset_baris[i + 1] adalah byte baris ke-i.
+        self.offset_baris = offset_baris
+
+    def _jumlah_dasar(self):
+        return len(self.offset_baris) - 1
+
+    def _ambil_dasar(self, posisi):
+        if len(posisi) == 0:
+            return pd.DataFrame(columns=self.columns)
+        awal = self.offset_baris[posisi]
+        panjang = self.offset_baris[posisi + 1] - awal
+        # Semua baris dikumpulkan dengan satu fancy-index atas file yang di-mmap,
+        # bukan satu seek+read per baris (pemanggil memegang lock_indeks).
+        with open(self.path_csv, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+            isi = np.frombuffer(m, dtype=np.uint8)
+            # Baris terakhir file bisa tanpa newline: beri satu byte tambahan.
+            tanpa_newline = isi[awal + panjang - 1] != ord("\n")
+            panjang_keluar = panjang + tanpa_newline
+            awal_keluar = np.concatenate(([0], np.cumsum(panjang_keluar)[:-1]))
+            dalam = np.arange(panjang.sum()) - np.repeat(np.cumsum(panjang) - panjang, panjang)
+            keluar = np.full(panjang_keluar.sum(), ord("\n"), dtype=np.uint8)
+            keluar[np.repeat(awal_keluar, panjang) + dalam] = isi[np.repeat(awal, panjang) + dalam]
+            del isi
+        return _baca_blok(keluar.tobytes(), self.columns)
+
+def _baca_blok(data, kolom):
+    """Parsing potongan CSV tanpa header, satu baris DataFrame per baris file."""
+    # CRLF (ekspor Excel/Windows) dinormalisasi dulu agar jumlah baris hasil
+    # parsing selalu sama dengan jumlah newline, apa pun versi parser-nya.
+    return pd.read_csv(io.BytesIO(data.replace(b"\r\n", b"\n")), header=None, names=kolom,
+                       dtype=str, skip_blank_lines=False)
+
+def _reset_puncak_memori():
+    """Mereset puncak RSS proses (VmHWM, Linux); False jika tidak didukung."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+def _memori_mb(kunci="VmHWM"):
+    """
+    Nilai memori proses dari /proc/self/status dalam MB, atau None: VmHWM
+    (puncak RSS sejak _reset_puncak_memori()) atau VmRSS (RSS saat ini).
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for baris in f:
+                if baris.startswith(kunci + ":"):
+                    return int(baris.split()[1]) / 1024
+    except OSError:
+        pass
     return None
 
+def _kode_kolom(chunk, kolom, kamus):
+    """
+    Kode integer global per baris untuk nilai `kolom` (lowercase, strip).
+    `kamus` (nilai -> kode) bertambah antar chunk; nilai kosong diberi -1.
+    """
+    if kolom not in chunk.columns:
+        return np.full(len(chunk), -1, dtype=np.int32)
+    kunci = chunk[kolom].astype("string").str.strip().str.lower()
+    kode_lokal, unik = pd.factorize(kunci)
+    peta = np.array([kamus.setdefault(k, len(kamus)) if k else -1 for k in unik] + [-1], dtype=np.int32)
+    # kode_lokal -1 (NaN) menunjuk elemen terakhir `peta`, yaitu -1.
+    return peta[kode_lokal]
+
+def _kelompokkan_kode(kode, kamus):
+    """Sama dengan _kunci_terurut(), tetapi dari kode global hasil _kode_kolom()."""
+    nama = np.array(list(kamus), dtype=object)
+    urutan_nama = np.argsort(nama, kind='stable')
+    peringkat = np.empty(len(nama), dtype=np.int64)
+    peringkat[urutan_nama] = np.arange(len(nama))
+    posisi = np.flatnonzero(kode >= 0)
+    kode_terurut = peringkat[kode[posisi]]
+    urutan = np.argsort(kode_terurut, kind='stable')
+    batas = np.concatenate(([0], np.cumsum(np.bincount(kode_terurut, minlength=len(nama)))))
+    return nama[urutan_nama], batas.astype(np.int64), posisi[urutan].astype(np.int64)
+
+def muat_data_bertahap(path_csv=PATH_CSV, ukuran_blok=64 << 20):
+    """
+    Membaca CSV per blok `ukuran_blok` byte tanpa pernah memuat seluruh file
+    ke memori. Setiap blok hanya menyumbang kode integer per baris (obat,
+    kategori, pemesan) dan tanggalnya; setelah blok terakhir, BST dan indeks
+    sekunder dibentuk dari kode tersebut. Yang tersimpan hanya offset baris
+    (di TabelCSV) dan indeks itu sendiri.
+    Mengembalikan (tabel, root, indeks_kategori, indeks_pemesan, indeks_tanggal,
+    ringkasan, ukuran_csv), dengan ukuran_csv jumlah byte CSV yang termuat.
+    Asumsi: tidak ada newline di dalam field yang di-quote.
+    """
+    mulai = time.perf_counter()
+    # Puncak yang dilaporkan hanya mencakup ingestion ini, bukan umur proses.
+    rss_awal = _memori_mb("VmRSS") if _reset_puncak_memori() else None
+    kolom = pd.read_csv(path_csv, nrows=0).columns
+    daftar_offset = []
+    kolom_kode = ('Nama Obat', 'Kategori Penyakit', 'Nama Pemesan')
+    kamus = {kol: {} for kol in kolom_kode}
+    daftar_kode = {kol: [] for kol in kolom_kode}
+    daftar_tanggal, daftar_baris_tanggal = [], []
+    ringkasan = RingkasanPesanan()
+    jumlah_baris = 0
+    jumlah_blok = 0
+
+    with open(path_csv, "rb") as f:
+        f.readline()
+        basis = f.tell()
+        sisa = b""
+        while True:
+            blok = f.read(ukuran_blok)
+            data = sisa + blok
+            akhir = data.rfind(b"\n") + 1 if blok else len(data)
+            lengkap, sisa = data[:akhir], data[akhir:]
+            if lengkap:
+                awal_baris = np.flatnonzero(np.frombuffer(lengkap, dtype=np.uint8) == ord("\n")) + 1
+                awal_baris = np.concatenate(([0], awal_baris[awal_baris < len(lengkap)]))
+                chunk = _baca_blok(lengkap, kolom)
+                if len(chunk) != len(awal_baris):
+                    raise ValueError("CSV berisi newline di dalam field; gunakan mode biasa (muat_data).")
+                daftar_offset.append(awal_baris + basis)
+
+                for kol in kolom_kode:
+                    daftar_kode[kol].append(_kode_kolom(chunk, kol, kamus[kol]))
+                tanggal, baris_tanggal = bangun_indeks_tanggal(chunk)
+                daftar_tanggal.append(tanggal)
+                daftar_baris_tanggal.append(baris_tanggal + jumlah_baris)
+                ringkasan.tambah(chunk)
+
+                jumlah_baris += len(chunk)
+                jumlah_blok += 1
+                basis += akhir
+            if not blok:
+                break
+
+    daftar_offset.append(np.array([basis], dtype=np.int64))
+    tabel = TabelCSV(path_csv, kolom, np.concatenate(daftar_offset).astype(np.int64))
+    kode = {kol: np.concatenate(daftar_kode[kol]) if daftar_kode[kol] else np.empty(0, dtype=np.int32)
+            for kol in kolom_kode}
+    kunci_unik, batas, baris = _kelompokkan_kode(kode['Nama Obat'], kamus['Nama Obat'])
+    root = _bangun_dari_terurut(kunci_unik, batas, baris, 0, len(kunci_unik))
+    indeks_hash = {}
+    for kol in ('Kategori Penyakit', 'Nama Pemesan'):
+        kunci_unik, batas, baris = _kelompokkan_kode(kode[kol], kamus[kol])
+        indeks_hash[kol] = {k: baris[batas[i]:batas[i + 1]] for i, k in enumerate(kunci_unik)}
+    tanggal = np.concatenate(daftar_tanggal) if daftar_tanggal else np.empty(0, dtype='datetime64[ns]')
+    baris_tanggal = np.concatenate(daftar_baris_tanggal) if daftar_baris_tanggal else np.empty(0, dtype=np.int64)
+    urutan = np.argsort(tanggal, kind='stable')
+
+    puncak = _memori_mb("VmHWM") if rss_awal is not None else None
+    print(f"CSV dimuat bertahap: {jumlah_baris} baris dalam {jumlah_blok} blok, "
+          f"{time.perf_counter() - mulai:.2f} detik"
+          + (f", puncak RSS {puncak:.0f} MB (+{puncak - rss_awal:.0f} MB selama muat)." if puncak else "."))
+    return (tabel, root, indeks_hash['Kategori Penyakit'], indeks_hash['Nama Pemesan'],
+            (tanggal[urutan], baris_tanggal[urutan]), ringkasan, basis)
+
 # Bangun BST
-root = None
-if not df.empty:
-    for _, row in df.iterrows():
-        root = insert(root, row)
-else:
-    print("DataFrame kosong, BST tidak dibangun.")
-
-# Ambil daftar nama obat unik untuk dropdown
-if not df.empty and 'Nama Obat' in df.columns:
-    daftar_obat_unique = sorted(df['Nama Obat'].dropna().astype(str).str.strip().str.title().unique())
-    daftar_obat = ["-"] + daftar_obat_unique
-else:
-    daftar_obat = ["-"]
+class KunciIndeks:
+    """
+    RLock untuk df/root/indeks yang juga membangun indeks saat pertama kali
+    dipakai, sehingga impor modul tidak membaca CSV. Thread lain yang masuk
+    selama pembangunan menunggu sampai indeks siap.
+    Fungsi yang hanya membaca pohon dari pemanggil (bukan global `root`)
+    memakai tanpa_bangun(): lock yang sama, tetapi tidak memuat PATH_CSV.
+    """
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.siap = False
+
+    def __enter__(self):
+        self._lock.acquire()
+        if not self.siap:
+            # Ditandai lebih dulu: bangun_semua_indeks() sendiri masuk ke lock ini.
+            self.siap = True
+            try:
+                bangun_semua_indeks()
+            except BaseException:
+                self.siap = False
+                self._lock.release()
+                raise
+        return self
+
+    def __exit__(self, *exc):
+        self._lock.release()
+
+    def tanpa_bangun(self):
+        """Context manager lock saja, tanpa membangun indeks global."""
+        return self._lock
+
+# Semua akses ke df/root/indeks dilindungi lock ini: pencarian yang sedang
+# berjalan tidak akan melihat pohon yang sedang dirotasi oleh ingestion.
+lock_indeks = KunciIndeks()
+# Diisi oleh bangun_semua_indeks() saat lock_indeks pertama kali dipakai.
+df = root = indeks_fuzzy = indeks_kategori = indeks_pemesan = indeks_tanggal = ringkasan = None
+# Naik setiap kali isi indeks berubah (dipakai untuk invalidasi cache).
+versi_indeks = 0
+# (tanggal, baris) per batch tambah_pesanan() yang belum digabung ke
+# indeks_tanggal; lihat _indeks_tanggal_terkini().
+_ekor_tanggal = []
+# Jumlah byte PATH_CSV yang termuat pada build terakhir (titik awal PengawasCSV).
+ukuran_csv_indeks = 0
+
+def bangun_semua_indeks():
+    """Memuat ulang df dan membangun BST serta semua indeks sekunder."""
+    global df, root, indeks_fuzzy, indeks_kategori, indeks_pemesan, indeks_tanggal, ringkasan, versi_indeks
+    global ukuran_csv_indeks
+    if MODE_CSV_BERTAHAP and os.path.exists(PATH_CSV):
+        (df_baru, root_baru, kategori_baru, pemesan_baru, tanggal_baru, ringkasan_baru,
+         ukuran_baru) = muat_data_bertahap()
+    else:
+        df_baru, root_baru, ukuran_baru = muat_data(tulis_snapshot=TULIS_SNAPSHOT)
+        kategori_baru = bangun_indeks_hash(df_baru, 'Kategori Penyakit')
+        pemesan_baru = bangun_indeks_hash(df_baru, 'Nama Pemesan')
+        tanggal_baru = bangun_indeks_tanggal(df_baru)
+        ringkasan_baru = RingkasanPesanan(df_baru)
+    if root_baru is None:
+        print("DataFrame kosong, BST tidak dibangun.")
+    fuzzy_baru = IndeksNgram(node.nama_obat for node in iter_inorder(root_baru))
+    # tanpa_bangun(): dipanggil langsung (mis. rebuild PengawasCSV) tidak
+    # boleh memicu build pertama lebih dulu.
+    with lock_indeks.tanpa_bangun():
+        lock_indeks.siap = True
+        df, root = df_baru, root_baru
+        indeks_fuzzy, indeks_kategori, indeks_pemesan = fuzzy_baru, kategori_baru, pemesan_baru
+        indeks_tanggal = tanggal_baru
+        ringkasan = ringkasan_baru
+        ukuran_csv_indeks = ukuran_baru
+        _ekor_tanggal.clear()
+        versi_indeks += 1
+
+def pastikan_indeks():
+    """Membangun indeks sekarang jika belum (mis. sebelum fork atau membaca `root` langsung)."""
+    with lock_indeks:
+        pass
+
+def mulai_bangun_indeks():
+    """Membangun indeks di thread latar, mis. selagi server UI/API dinyalakan."""
+    thread = threading.Thread(target=pastikan_indeks, daemon=True, name="bangun-indeks")
+    thread.start()
+    return thread
+
+# --- Ingestion inkremental pesanan baru ---
+def tambah_pesanan(pesanan_baru):
+    """
+    Menambahkan batch pesanan (DataFrame atau list of dict dengan kolom CSV)
+    ke df dan memasukkan hanya baris baru itu ke BST dan indeks sekunder,
+    tanpa rebuild. Biayanya amortized O(k log n) untuk k baris: array offset
+    node dan posting hash ditambah lewat _tambah_offset(), dan tanggal hanya
+    dicatat sebagai ekor yang digabung saat indeks tanggal dibaca berikutnya
+    (satu merge O(jumlah baris df) per pembacaan, bukan per batch).
+    Mengembalikan jumlah baris yang ditambahkan.
+    """
+    global df, root, versi_indeks
+    baru = pd.DataFrame(pesanan_baru).reset_index(drop=True)
+    if baru.empty:
+        return 0
+
+    # Pengelompokan dan indeks yang hanya bergantung pada batch dihitung di
+    # luar lock (offset relatif terhadap batch); di dalam lock hanya digabung.
+    kunci_unik, batas, baris_kunci = _kunci_terurut(baru)
+    hash_baru = [(indeks_kolom, bangun_indeks_hash(baru, kolom))
+                 for indeks_kolom, kolom in (('kategori', 'Kategori Penyakit'), ('pemesan', 'Nama Pemesan'))]
+    tanggal_tambahan, baris_tambahan = bangun_indeks_tanggal(baru)
+    ringkasan_baru = RingkasanPesanan(baru)
+
+    with lock_indeks:
+        if not isinstance(df, TabelBertambah):
+            df = TabelMemori(df)
+        awal = len(df)
+        df.tambah(baru)
+
+        # Satu insert per obat per batch, bukan per baris. Metrik "insert"
+        # mencatat durasi seluruh loop per batch; flag dibaca sekali.
+        ukur = METRIK_AKTIF
+        if ukur:
+            mulai = time.perf_counter()
+        for i, kunci in enumerate(kunci_unik):
+            if _cari_node(root, kunci) is None:
+                indeks_fuzzy.tambah(kunci)
+            root = _insert(root, kunci, baris_kunci[batas[i]:batas[i + 1]] + awal)
+        if ukur:
+            metrik.catat("insert", time.perf_counter() - mulai)
+            metrik.tambah("insert.kunci", len(kunci_unik))
+
+        for indeks_kolom, tambahan in hash_baru:
+            indeks = indeks_kategori if indeks_kolom == 'kategori' else indeks_pemesan
+            for nilai, posisi in tambahan.items():
+                indeks[nilai] = _tambah_offset(indeks.get(nilai, np.empty(0, dtype=np.int64)), posisi + awal)
+
+        _ekor_tanggal.append((tanggal_tambahan, baris_tambahan + awal))
+        ringkasan.gabung(ringkasan_baru)
+        versi_indeks += 1
+        # Hanya hasil pencarian obat yang ada di batch ini yang kedaluwarsa.
+        cache_hasil.perbarui(versi_indeks - 1, versi_indeks, kunci_unik)
+    return len(baru)
+
+class PengawasCSV(threading.Thread):
+    """
+    Thread yang memantau PATH_CSV dan memasukkan baris yang ditambahkan di
+    akhir file ke indeks lewat tambah_pesanan(). Hanya baris yang sudah
+    diakhiri newline yang dibaca. Jika file menyusut (diganti/dipotong),
+    seluruh indeks dibangun ulang.
+    Pembacaan dimulai dari ukuran_csv_indeks, yaitu byte yang benar-benar
+    termuat oleh build terakhir, bukan ukuran file saat thread dimulai:
+    baris yang ditambahkan selama build tetap ikut masuk.
+    """
+    def __init__(self, path_csv=PATH_CSV, interval=5.0):
+        super().__init__(daemon=True)
+        self.path_csv = path_csv
+        self.interval = interval
+        self.offset = None
+        self._berhenti = threading.Event()
+
+    def _sinkronkan_offset(self):
+        # Menunggu build yang sedang berjalan (atau memulainya) lebih dulu.
+        pastikan_indeks()
+        with lock_indeks:
+            self.offset = ukuran_csv_indeks
+
+    def run(self):
+        self._sinkronkan_offset()
+        while not self._berhenti.wait(self.interval):
+            try:
+                self.periksa()
+            except Exception as e:
+                print(f"Peringatan: gagal memasukkan pesanan baru dari CSV ({e}).")
+
+    def berhenti(self):
+        self._berhenti.set()
+
+    def periksa(self):
+        if self.offset is None:
+            self._sinkronkan_offset()
+        if not os.path.exists(self.path_csv):
+            return 0
+        ukuran = os.path.getsize(self.path_csv)
+        if ukuran < self.offset:
+            print(f"File '{self.path_csv}' berubah, membangun ulang indeks.")
+            bangun_semua_indeks()
+            self._sinkronkan_offset()
+            return 0
+        if ukuran == self.offset:
+            return 0
+
+        with open(self.path_csv, "rb") as f:
+            f.seek(self.offset)
+            potongan = f.read(ukuran - self.offset)
+        akhir = potongan.rfind(b"\n") + 1
+        if akhir == 0:
+            return 0
+
+        if self.offset == 0:
+            # File belum ada saat indeks dibangun: baris pertamanya adalah header.
+            baru = pd.read_csv(io.BytesIO(potongan[:akhir]))
+        else:
+            kolom = pd.read_csv(self.path_csv, nrows=0).columns
+            baru = pd.read_csv(io.BytesIO(potongan[:akhir]), header=None, names=kolom)
+        self.offset += akhir
+        jumlah = tambah_pesanan(baru)
+        if jumlah:
+            print(f"{jumlah} pesanan baru dari '{self.path_csv}' dimasukkan ke indeks.")
+        return jumlah
 
 # --- Fungsi untuk Visualisasi BST di Terminal (Teks, Terurut Menurun) ---
-def print_tree_terminal(node, prefix="", is_last_child_from_parent=True):
+def iter_tree_terminal(node, prefix="", is_last_child_from_parent=True, maks_kedalaman=None, maks_node=None):
     """
-    Mencetak struktur pohon ke terminal secara visual,
-    dengan urutan node dari terbesar ke terkecil (descending) jika dibaca dari atas ke bawah.
-    Menggunakan traversal Right-Node-Left.
+    Generator baris-baris struktur pohon, dengan urutan node dari terbesar ke
+    terkecil (descending) jika dibaca dari atas ke bawah (traversal
+    Right-Node-Left). Iteratif dengan stack eksplisit, sehingga pohon yang
+    sangat dalam tidak memicu RecursionError.
     Args:
-        node: Node BST saat ini.
+        node: Node BST awal.
         prefix: String untuk indentasi dan garis cabang.
         is_last_child_from_parent: Boolean, True jika 'node' ini adalah anak terakhir
                                      yang dicetak oleh parent-nya dalam urutan traversal ini.
                                      Ini menentukan jenis konektor ('L--' atau '|--').
+        maks_kedalaman: Jika diisi, node pada kedalaman ini tidak diekspansi
+                        (ditandai ' [+]' bila masih punya anak).
+        maks_node: Jika diisi, berhenti setelah sekian node dicetak.
     """
     if node is None:
         return
 
-    # Tentukan prefix untuk anak-anak dari node saat ini.
-    # Jika node saat ini adalah anak terakhir yang dicetak oleh parent-nya,
-    # maka garis vertikal tidak perlu dilanjutkan untuk sibling dari node ini.
-    # Sebaliknya, jika node ini bukan anak terakhir, garis vertikal ('|') harus ada.
-    prefix_for_children = prefix + ("    " if is_last_child_from_parent else "|   ")
+    # Item stack: (node, prefix, is_last, kedalaman) untuk dikunjungi, atau
+    # (None, baris) untuk baris yang siap dicetak.
+    stack = [(node, prefix, is_last_child_from_parent, 0)]
+    jumlah = 0
+    while stack:
+        item = stack.pop()
+        if item[0] is None:
+            if maks_node is not None and jumlah >= maks_node:
+                yield f"... (dipotong setelah {maks_node} node)"
+                return
+            jumlah += 1
+            yield item[1]
+            continue
 
-    # 1. Traverse anak kanan (nilai lebih besar)
-    if node.right:
-        # Anak kanan diproses terlebih dahulu. Dalam traversal Right-Node-Left,
-        # anak kanan bukanlah anak "terakhir" yang diproses oleh 'node' ini
-        # (karena 'node' sendiri dan anak kiri akan diproses setelahnya).
-        print_tree_terminal(node.right, prefix_for_children, False)
+        current, prefix, is_last, kedalaman = item
+        # Jika node adalah anak terakhir yang dicetak oleh parent-nya, garis
+        # vertikal tidak perlu dilanjutkan untuk sibling-nya.
+        prefix_for_children = prefix + ("    " if is_last else "|   ")
+        ekspansi = maks_kedalaman is None or kedalaman < maks_kedalaman
+        connector = "L-- " if is_last else "|-- "
+        tanda = " [+]" if not ekspansi and (current.left or current.right) else ""
+        baris = prefix + connector + f"{current.nama_obat.title()} (Data: {len(current.data)}){tanda}"
 
-    # 2. Cetak node saat ini
-    connector = "L-- " if is_last_child_from_parent else "|-- "
-    display_nama_obat = node.nama_obat.title()
-    print(prefix + connector + f"{display_nama_obat} (Data: {len(node.data)})")
+        # Didorong terbalik: kanan dulu dikeluarkan, lalu node, lalu kiri
+        # (anak kiri adalah anak terakhir yang dicetak oleh node ini).
+        if ekspansi and current.left:
+            stack.append((current.left, prefix_for_children, True, kedalaman + 1))
+        stack.append((None, baris))
+        if ekspansi and current.right:
+            stack.append((current.right, prefix_for_children, False, kedalaman + 1))
 
-    # 3. Traverse anak kiri (nilai lebih kecil)
-    if node.left:
-        # Anak kiri diproses terakhir oleh 'node' ini.
-        # Jadi, ia adalah 'last_child_from_parent' relatif terhadap 'node'.
-        print_tree_terminal(node.left, prefix_for_children, True)
+def print_tree_terminal(node, prefix="", is_last_child_from_parent=True, file=None,
+                        maks_kedalaman=None, maks_node=None, baris_per_tulis=1000):
+    """
+    Mencetak struktur pohon dari iter_tree_terminal() ke `file` (default
+    sys.stdout). Baris dikumpulkan dan ditulis per `baris_per_tulis` baris
+    sekaligus, bukan satu print() per node; berikan file yang dibuka untuk
+    menulis untuk menyimpan dump pohon besar.
+    Lock hanya dipegang selama satu potongan baris dibentuk, tidak selama
+    file.write(), sehingga pipe yang lambat tidak menahan pencarian dan
+    ingestion. Akibatnya, jika ada ingestion di tengah dump, potongan
+    berikutnya mengikuti bentuk pohon terbaru.
+    """
+    file = file or sys.stdout
+    baris = iter_tree_terminal(node, prefix, is_last_child_from_parent, maks_kedalaman, maks_node)
+    while True:
+        # Pohon berasal dari pemanggil: jangan memicu build indeks global.
+        with lock_indeks.tanpa_bangun():
+            potongan = list(itertools.islice(baris, baris_per_tulis))
+        if not potongan:
+            break
+        file.write("\n".join(potongan) + "\n")
+    file.flush()
 
 
 # --- Fungsi untuk Visualisasi BST dengan Matplotlib (Simpan ke File) ---
-# Fungsi _assign_positions_recursive, _draw_tree_matplotlib_recursive, 
-# visualize_bst_matplotlib, dan collect_all_nodes tetap sama.
-def _assign_positions_recursive(node, x=0, y=0, x_dist=1.0, y_dist=1.0, positions=None, depth=0, x_coords_at_depth=None):
-    """Helper rekursif untuk menentukan posisi node untuk Matplotlib."""
-    if node is None:
-        return x 
+def _hitung_layout(tree_root, maks_kedalaman=None):
+    """
+    Layout iteratif (tanpa rekursi): x = urutan in-order, y = -kedalaman.
+    Node pada `maks_kedalaman` yang masih punya anak ditandai 'diciutkan'
+    dan subtree-nya tidak dikunjungi. Posisi disimpan di array terpisah,
+    bukan di atribut node. Mengembalikan (nodes, xs, ys, diciutkan, segmen).
+    """
+    batas = float('inf') if maks_kedalaman is None else maks_kedalaman
+    nodes, ys, diciutkan, parent = [], [], [], []
+    stack = []
+    current = (tree_root, 0, None) if tree_root is not None else None
+    while stack or current is not None:
+        while current is not None:
+            stack.append(current)
+            node, kedalaman, _ = current
+            current = (node.left, kedalaman + 1, node) if node.left and kedalaman < batas else None
+        node, kedalaman, induk = stack.pop()
+        nodes.append(node)
+        ys.append(-kedalaman)
+        parent.append(induk)
+        diciutkan.append(kedalaman >= batas and (node.left is not None or node.right is not None))
+        current = (node.right, kedalaman + 1, node) if node.right and kedalaman < batas else None
 
-    if positions is None:
-        positions = {}
-    if x_coords_at_depth is None:
-        x_coords_at_depth = {}
+    xs = np.arange(len(nodes), dtype=float)
+    ys = np.asarray(ys, dtype=float)
+    indeks = {id(node): i for i, node in enumerate(nodes)}
+    anak = np.array([i for i, p in enumerate(parent) if p is not None], dtype=np.int64)
+    induk = np.array([indeks[id(p)] for p in parent if p is not None], dtype=np.int64)
+    segmen = np.stack([np.column_stack([xs[induk], ys[induk]]),
+                       np.column_stack([xs[anak], ys[anak]])], axis=1) if len(anak) else np.empty((0, 2, 2))
+    return nodes, xs, ys, np.asarray(diciutkan, dtype=bool), segmen
 
-    left_x_offset = x
-    if node.left:
-        left_x_offset = _assign_positions_recursive(node.left, x, y - y_dist, x_dist / 2, y_dist, positions, depth + 1, x_coords_at_depth)
-    
-    current_x = left_x_offset
-    if node.left: 
-        current_x += x_dist / (2**(depth+1)) 
-
-    while x_coords_at_depth.get(depth, -float('inf')) >= current_x :
-        current_x += 0.2 
-
-    node.x = current_x
-    node.y = y
-    positions[node.nama_obat] = (node.x, node.y)
-    x_coords_at_depth[depth] = current_x 
-
-    right_x_start = current_x
-    if node.right:
-        if node.left: 
-            right_x_start += x_dist / (2**(depth+1))
-        else: 
-            right_x_start += x_dist / (2**(depth+1)) 
-        _assign_positions_recursive(node.right, right_x_start, y - y_dist, x_dist / 2, y_dist, positions, depth + 1, x_coords_at_depth)
-    
-    return max(current_x, right_x_start + (x_dist / (2**(depth+1)) if node.right else 0) )
+def _label_layout(nodes, diciutkan):
+    return [f"{node.nama_obat.title()}\n(Data: {len(node.data)})" + (" ▸" if ciut else "")
+            for node, ciut in zip(nodes, diciutkan)]
 
+def _gambar_pohon(label, xs, ys, diciutkan, segmen, filename, title, maks_label=200):
+    """Menggambar layout yang sudah dihitung ke file PNG."""
+    # Memakai API objek Matplotlib (Figure), bukan pyplot, agar aman
+    # dijalankan di thread worker render.
+    from matplotlib.collections import LineCollection
+    from matplotlib.figure import Figure
 
-def _draw_tree_matplotlib_recursive(node, ax):
-    """Helper rekursif untuk menggambar node dan edge dengan Matplotlib."""
-    if node is None:
-        return
+    warna = np.where(diciutkan, 'orange', 'skyblue')
 
-    label = f"{node.nama_obat.title()}\n(Data: {len(node.data)})"
-    ax.text(node.x, node.y, label, ha='center', va='center',
-            bbox=dict(facecolor='skyblue', alpha=0.7, edgecolor='black', boxstyle='round,pad=0.5'))
+    # Ukuran figure mengikuti jumlah node/level, dibatasi agar file tetap wajar.
+    fig = Figure(figsize=(min(max(8.0, len(label) * 0.9), 60.0),
+                          min(max(4.0, (1 - ys.min()) * 1.2), 30.0)))
+    ax = fig.add_subplot()
+    ax.add_collection(LineCollection(segmen, colors='gray', linewidths=1.0 if len(label) <= maks_label else 0.3))
 
-    if node.left:
-        ax.plot([node.x, node.left.x], [node.y, node.left.y], 'k-', lw=1.5, color='gray')
-        _draw_tree_matplotlib_recursive(node.left, ax)
-    if node.right:
-        ax.plot([node.x, node.right.x], [node.y, node.right.y], 'k-', lw=1.5, color='gray')
-        _draw_tree_matplotlib_recursive(node.right, ax)
+    if len(label) <= maks_label:
+        for teks, x, y, c in zip(label, xs, ys, warna):
+            ax.text(x, y, teks, ha='center', va='center',
+                    bbox=dict(facecolor=c, alpha=0.7, edgecolor='black', boxstyle='round,pad=0.5'))
+    else:
+        ax.scatter(xs, ys, s=4, c=warna, zorder=2)
+
+    ax.set_xlim(xs.min() - 1, xs.max() + 1)
+    ax.set_ylim(ys.min() - 1, ys.max() + 1)
+    ax.axis('off')
+    ax.set_title(title, fontsize=16)
+    fig.savefig(filename)
 
-def visualize_bst_matplotlib(tree_root, filename="bst_matplotlib.png", title="Visualisasi BST"):
-    """Membuat visualisasi BST menggunakan Matplotlib dan menyimpannya ke file."""
+def visualize_bst_matplotlib(tree_root, filename="bst_matplotlib.png", title="Visualisasi BST",
+                             maks_kedalaman=None, maks_label=200):
+    """
+    Membuat visualisasi BST menggunakan Matplotlib dan menyimpannya ke file.
+    Semua edge digambar sekaligus dengan satu LineCollection. `maks_kedalaman`
+    membatasi level yang digambar (node yang subtree-nya diciutkan berwarna
+    oranye); berikan node hasil search() sebagai `tree_root` untuk melihat satu
+    subtree. Jika node yang terlihat lebih dari `maks_label`, node digambar
+    sebagai titik (satu scatter) tanpa label teks agar tetap cepat dan terbaca.
+    """
     if tree_root is None:
         print(f"Pohon ({title}) kosong, tidak ada yang divisualisasikan dengan Matplotlib.")
-        fig, ax = plt.subplots(figsize=(6, 4))
+        from matplotlib.figure import Figure
+        fig = Figure(figsize=(6, 4))
+        ax = fig.add_subplot()
         ax.text(0.5, 0.5, f"{title} Kosong", ha='center', va='center', fontsize=12)
         ax.axis('off')
-        plt.title(title)
-        plt.savefig(filename)
-        plt.close(fig)
+        ax.set_title(title)
+        fig.savefig(filename)
         print(f"Gambar '{filename}' untuk pohon kosong telah disimpan.")
         return
 
-    fig, ax = plt.subplots(figsize=(15, 10)) 
-    
-    node_positions = {}
-    x_coords_by_depth = {} 
-    
-    max_depth = [0]
-    def get_max_depth(node, current_depth):
-        if not node: return
-        max_depth[0] = max(max_depth[0], current_depth)
-        get_max_depth(node.left, current_depth + 1)
-        get_max_depth(node.right, current_depth + 1)
-    get_max_depth(tree_root, 0)
-
-    current_x = [0] 
-    def assign_xy(node, depth=0, y_spacing=1):
-        if not node:
-            return
-        
-        assign_xy(node.left, depth + 1, y_spacing)
-        
-        node.x = current_x[0]
-        node.y = -depth * y_spacing 
-        current_x[0] += 1 
-        
-        assign_xy(node.right, depth + 1, y_spacing)
+    # Layout dan label diambil di bawah lock (tanpa memicu build indeks
+    # global); menggambar dilakukan di luar lock agar pencarian tidak
+    # tertahan selama rendering.
+    with lock_indeks.tanpa_bangun():
+        nodes, xs, ys, diciutkan, segmen = _hitung_layout(tree_root, maks_kedalaman)
+        label = _label_layout(nodes, diciutkan)
+    _gambar_pohon(label, xs, ys, diciutkan, segmen, filename, title, maks_label)
+    print(f"Visualisasi Matplotlib '{title}' disimpan sebagai '{filename}'")
 
-    assign_xy(tree_root) 
+# --- Cache hasil pencarian (LRU, dibatasi ukuran byte) ---
+class CacheLRU:
+    """
+    Cache LRU untuk DataFrame hasil pencarian, dibatasi total ukuran byte
+    (memory_usage deep). tambah_pesanan() memanggil perbarui() sehingga hanya
+    entri obat yang ada di batch yang dibuang; perubahan `versi` indeks lain
+    yang tidak dilaporkan (mis. rebuild) tetap membuang seluruh isi. Hasil
+    yang dihitung pada versi lebih lama dari cache tidak disimpan.
+    DataFrame yang dikembalikan dipakai bersama, jadi jangan dimodifikasi
+    oleh pemanggil.
+    """
+    def __init__(self, maks_byte=64 * 1024 * 1024):
+        self.maks_byte = maks_byte
+        self.ukuran_byte = 0
+        self.hit = 0
+        self.miss = 0
+        self.eviction = 0
+        self.versi = None
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
 
-    _draw_tree_matplotlib_recursive(tree_root, ax)
+    def _cek_versi(self, versi):
+        if versi != self.versi:
+            self._data.clear()
+            self.ukuran_byte = 0
+            self.versi = versi
 
-    all_x = [n.x for n in collect_all_nodes(tree_root)]
-    all_y = [n.y for n in collect_all_nodes(tree_root)]
-    if all_x and all_y:
-        ax.set_xlim(min(all_x) - 1, max(all_x) + 1)
-        ax.set_ylim(min(all_y) - 1, max(all_y) + 1)
-    
-    ax.axis('off') 
-    plt.title(title, fontsize=16)
-    plt.savefig(filename)
-    plt.close(fig) 
-    print(f"Visualisasi Matplotlib '{title}' disimpan sebagai '{filename}'")
+    def ambil(self, kunci, versi):
+        with self._lock:
+            self._cek_versi(versi)
+            item = self._data.get(kunci)
+            if item is None:
+                self.miss += 1
+                return None
+            self._data.move_to_end(kunci)
+            self.hit += 1
+            return item[0]
+
+    def simpan(self, kunci, nilai, versi):
+        # Nilai berupa DataFrame atau tuple yang diawali DataFrame (mis. beserta keterangan).
+        tabel = nilai[0] if isinstance(nilai, tuple) else nilai
+        ukuran = int(tabel.memory_usage(deep=True).sum())
+        with self._lock:
+            if self.versi is not None and versi < self.versi:
+                # Indeks sudah berubah sejak hasil ini dihitung; bisa jadi basi.
+                return
+            self._cek_versi(versi)
+            if ukuran > self.maks_byte:
+                return
+            lama = self._data.pop(kunci, None)
+            if lama is not None:
+                self.ukuran_byte -= lama[1]
+            self._data[kunci] = (nilai, ukuran)
+            self.ukuran_byte += ukuran
+            while self.ukuran_byte > self.maks_byte:
+                _, (_, ukuran_lama) = self._data.popitem(last=False)
+                self.ukuran_byte -= ukuran_lama
+                self.eviction += 1
 
-def collect_all_nodes(node, nodes_list=None):
-    """Mengumpulkan semua node dalam pohon (untuk mendapatkan batas plot)."""
-    if nodes_list is None:
-        nodes_list = []
-    if node:
-        nodes_list.append(node)
-        collect_all_nodes(node.left, nodes_list)
-        collect_all_nodes(node.right, nodes_list)
-    return nodes_list
+    def perbarui(self, versi_lama, versi_baru, kunci_berubah):
+        """
+        Memindahkan cache dari versi_lama ke versi_baru dengan hanya membuang
+        entri (nama_obat, fuzzy) yang nama_obat-nya ada di `kunci_berubah`,
+        ditambah semua entri fuzzy (kandidatnya bisa berubah oleh obat baru).
+        Jika cache tidak berada di versi_lama, seluruh isi dibuang.
+        """
+        with self._lock:
+            if self.versi != versi_lama:
+                self._cek_versi(versi_baru)
+                return
+            kunci_berubah = set(kunci_berubah)
+            for kunci in [k for k in self._data if k[1] or k[0] in kunci_berubah]:
+                _, ukuran = self._data.pop(kunci)
+                self.ukuran_byte -= ukuran
+            self.versi = versi_baru
 
+    def statistik(self):
+        with self._lock:
+            total = self.hit + self.miss
+            return {
+                "hit": self.hit,
+                "miss": self.miss,
+                "hit_rate": self.hit / total if total else 0.0,
+                "eviction": self.eviction,
+                "entri": len(self._data),
+                "ukuran_byte": self.ukuran_byte,
+                "maks_byte": self.maks_byte,
+            }
+
+cache_hasil = CacheLRU()
 
 # Fungsi pencarian untuk Gradio
-def cari_obat_gradio(nama_obat_input):
+def cari_obat_gradio(nama_obat_input, fuzzy=False):
+    """
+    Mengembalikan (tabel pesanan, keterangan). Dengan `fuzzy`, jika nama tidak
+    ditemukan persis, pesanan obat yang paling mirip ditampilkan dan
+    keterangan menyebut obat pengganti itu beserta kandidat lain terurut.
+    """
     if not nama_obat_input or str(nama_obat_input).strip() == "-" or not str(nama_obat_input).strip():
         return pd.DataFrame([{
             "Nama Pemesan": "Silakan pilih atau ketik nama obat untuk dicari.",
             "Kategori Penyakit": "",
             "Tanggal Pesan": ""
-        }])
+        }]), ""
     
-    node_hasil = search(root, str(nama_obat_input))
-    if node_hasil:
-        hasil_df = pd.DataFrame(node_hasil.data)
+    kunci_cache = (str(nama_obat_input).strip().lower(), bool(fuzzy))
+    # Flag dibaca sekali: aktifkan_metrik() bisa mengubahnya di tengah panggilan.
+    ukur = METRIK_AKTIF
+    if ukur:
+        mulai = time.perf_counter()
+    with lock_indeks:
+        versi = versi_indeks
+        hasil_cache = cache_hasil.ambil(kunci_cache, versi)
+        if hasil_cache is not None:
+            if ukur:
+                metrik.tambah("cari_obat_gradio.cache_hit")
+            return hasil_cache
+        node_hasil = search(root, str(nama_obat_input))
+        kandidat = []
+        if node_hasil is None and fuzzy:
+            # Nama obat yang mirip dari indeks n-gram, terurut menurut skor.
+            kandidat = indeks_fuzzy.cari(str(nama_obat_input), batas=JUMLAH_SARAN)
+            if kandidat:
+                node_hasil = search(root, kandidat[0][0])
+        if ukur:
+            selesai_tree = time.perf_counter()
+            metrik.catat("cari_obat_gradio.tree_walk", selesai_tree - mulai)
+        # Satu kali take() dari DataFrame bersama, O(k) untuk k hasil.
+        hasil_df = df.take(node_hasil.data).reset_index(drop=True) if node_hasil else None
+    if hasil_df is not None:
         kolom_tampil = ['Nama Pemesan', 'Kategori Penyakit', 'Tanggal Pesan']
         for kol in kolom_tampil:
             if kol not in hasil_df.columns:
                 hasil_df[kol] = ""
-        return hasil_df[kolom_tampil]
+        hasil_df = hasil_df[kolom_tampil]
+        if kandidat:
+            # Jangan mengganti obat diam-diam: sebutkan obat yang ditampilkan dan kandidat lain.
+            keterangan = (f"Obat '{str(nama_obat_input).strip()}' tidak ditemukan. Menampilkan "
+                          f"{len(hasil_df)} pesanan untuk **{kandidat[0][0].title()}** "
+                          f"(kemiripan {kandidat[0][1]:.0%}).")
+            if len(kandidat) > 1:
+                keterangan += " Kandidat lain: " + ", ".join(
+                    f"{kunci.title()} ({skor:.0%})" for kunci, skor in kandidat[1:]) + "."
+        else:
+            keterangan = f"{len(hasil_df)} pesanan untuk **{node_hasil.nama_obat.title()}**."
+        cache_hasil.simpan(kunci_cache, (hasil_df, keterangan), versi)
+        if ukur:
+            metrik.catat("cari_obat_gradio.dataframe", time.perf_counter() - selesai_tree)
+        return hasil_df, keterangan
     else:
         return pd.DataFrame([{
             "Nama Pemesan": f"Obat '{str(nama_obat_input)}' tidak ditemukan.",
             "Kategori Penyakit": "",
             "Tanggal Pesan": ""
-        }])
+        }]), f"Obat '{str(nama_obat_input)}' tidak ditemukan."
+
+# Fungsi pencarian banyak obat sekaligus (batch)
+KOLOM_BATCH = ['Nama Obat', 'Nama Pemesan', 'Kategori Penyakit', 'Tanggal Pesan']
+
+def cari_obat_batch(daftar_nama_obat):
+    """
+    Mengembalikan (hasil_df, tidak_ditemukan): satu DataFrame gabungan untuk
+    semua obat yang ditemukan, terurut berdasarkan nama obat, dibentuk dengan
+    satu take() dari df; serta daftar nama yang tidak ditemukan.
+    """
+    with lock_indeks:
+        node_hasil = search_batch(root, daftar_nama_obat)
+        daftar_node = [node_hasil[k] for k in sorted(node_hasil)]
+        posisi = (np.concatenate([node.data for node in daftar_node])
+                  if daftar_node else np.empty(0, dtype=np.int64))
+        hasil_df = df.take(posisi).reset_index(drop=True)
+
+    for kol in KOLOM_BATCH:
+        if kol not in hasil_df.columns:
+            hasil_df[kol] = ""
+    tidak_ditemukan = sorted({str(nama).strip() for nama in daftar_nama_obat
+                              if str(nama).strip() and str(nama).strip().lower() not in node_hasil})
+    return hasil_df[KOLOM_BATCH], tidak_ditemukan
+
+def cari_obat_batch_gradio(teks_daftar_obat):
+    # Satu nama obat per baris (koma juga diterima sebagai pemisah).
+    daftar_nama = [nama for baris in str(teks_daftar_obat or "").splitlines() for nama in baris.split(",")]
+    hasil_df, tidak_ditemukan = cari_obat_batch(daftar_nama)
+    keterangan = f"{len(hasil_df)} pesanan ditemukan."
+    if tidak_ditemukan:
+        keterangan += " Tidak ditemukan: " + ", ".join(tidak_ditemukan)
+    return hasil_df, keterangan
+
+# Fungsi pencarian pesanan berdasarkan indeks sekunder untuk Gradio
+MODE_PENCARIAN = ["Kategori Penyakit", "Nama Pemesan", "Rentang Tanggal"]
+KOLOM_PESANAN = ['Nama Pemesan', 'Kategori Penyakit', 'Nama Obat', 'Tanggal Pesan']
+
+def cari_pesanan_gradio(mode, nilai, tanggal_awal, tanggal_akhir):
+    def pesan(teks):
+        return pd.DataFrame([{"Nama Pemesan": teks, "Kategori Penyakit": "", "Nama Obat": "", "Tanggal Pesan": ""}])
+
+    if mode != "Rentang Tanggal" and (not nilai or not str(nilai).strip()):
+        return pesan(f"Silakan ketik {mode} untuk dicari.")
+
+    with lock_indeks:
+        if mode == "Rentang Tanggal":
+            try:
+                posisi = cari_rentang_tanggal(_indeks_tanggal_terkini(), tanggal_awal, tanggal_akhir)
+            except (ValueError, TypeError):
+                return pesan("Format tanggal tidak valid. Gunakan YYYY-MM-DD.")
+        else:
+            indeks = indeks_kategori if mode == "Kategori Penyakit" else indeks_pemesan
+            posisi = cari_hash(indeks, nilai)
+
+        if len(posisi) == 0:
+            return pesan("Tidak ada pesanan yang cocok.")
+        hasil_df = df.take(np.sort(posisi)).reset_index(drop=True)
+    for kol in KOLOM_PESANAN:
+        if kol not in hasil_df.columns:
+            hasil_df[kol] = ""
+    return hasil_df[KOLOM_PESANAN]
+
+# Fungsi saran nama obat saat pengguna mengetik
+JUMLAH_SARAN = 10
+
+def saran_obat_gradio(teks_input):
+    import gradio as gr
+
+    with lock_indeks:
+        saran = [node.nama_obat.title() for node in cari_prefix(root, teks_input or "", JUMLAH_SARAN)]
+        if not saran:
+            # Tidak ada awalan yang cocok: tawarkan nama yang mirip (salah ketik).
+            saran = [kunci.title() for kunci, _ in indeks_fuzzy.cari(teks_input or "", JUMLAH_SARAN)]
+    return gr.Dropdown(choices=saran, value=None)
+
+# --- Gambar subtree on-demand dengan cache content-addressed ---
+# Rendering berjalan di satu thread worker (startup dan handler lain tidak
+# menunggu plotting). Permintaan dicatat per (versi_indeks, root subtree,
+# kedalaman) sehingga tampilan ulang langsung memakai Future yang sudah
+# selesai. Nama file PNG adalah hash isi layout, jadi gambar yang sama juga
+# dipakai ulang lintas restart. Keduanya dibatasi: Future per LRU
+# (MAKS_CACHE_GAMBAR entri) dan file PNG per mtime sebagai waktu pemakaian
+# terakhir (MAKS_FILE_GAMBAR file).
+FOLDER_GAMBAR = "cache_gambar"
+MAKS_CACHE_GAMBAR = 256
+MAKS_FILE_GAMBAR = 500
+executor_gambar = ThreadPoolExecutor(max_workers=1, thread_name_prefix="render-bst")
+_cache_gambar = OrderedDict()
+_lock_cache_gambar = threading.Lock()
+
+def _pangkas_folder_gambar():
+    """Menghapus PNG yang paling lama tidak dipakai di atas MAKS_FILE_GAMBAR file."""
+    daftar = []
+    for entri in os.scandir(FOLDER_GAMBAR):
+        if entri.name.endswith(".png") and not entri.name.endswith(".tmp.png"):
+            try:
+                daftar.append((entri.stat().st_mtime, entri.path))
+            except FileNotFoundError:
+                pass
+    daftar.sort()
+    # Folder bisa dipakai bersama beberapa worker: file yang sudah dihapus
+    # proses lain diabaikan.
+    for _, path in daftar[:max(0, len(daftar) - MAKS_FILE_GAMBAR)]:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+def _render_subtree(node, maks_kedalaman, title):
+    with lock_indeks.tanpa_bangun():
+        nodes, xs, ys, diciutkan, segmen = _hitung_layout(node, maks_kedalaman)
+        label = _label_layout(nodes, diciutkan)
+
+    h = hashlib.sha256(title.encode())
+    h.update("\0".join(label).encode())
+    h.update(segmen.tobytes())
+    path = os.path.join(FOLDER_GAMBAR, f"{h.hexdigest()[:32]}.png")
+    try:
+        # mtime menandai pemakaian terakhir untuk _pangkas_folder_gambar().
+        os.utime(path)
+    except FileNotFoundError:
+        os.makedirs(FOLDER_GAMBAR, exist_ok=True)
+        sementara = f"{path}.{os.getpid()}.tmp.png"
+        _gambar_pohon(label, xs, ys, diciutkan, segmen, sementara, title)
+        os.replace(sementara, path)
+        _pangkas_folder_gambar()
+    return path
+
+def gambar_subtree(nama_obat=None, maks_kedalaman=4):
+    """
+    Mengembalikan Future berisi path PNG subtree dengan root `nama_obat`
+    (seluruh pohon jika kosong), atau None jika obat tidak ditemukan.
+    """
+    with lock_indeks:
+        versi = versi_indeks
+        node = search(root, nama_obat) if nama_obat and str(nama_obat).strip() else root
+    if node is None:
+        return None
+
+    kunci = (versi, node.nama_obat, maks_kedalaman)
+    with _lock_cache_gambar:
+        future = _cache_gambar.get(kunci)
+        if future is not None and future.done() and future.exception() is None:
+            try:
+                os.utime(future.result())
+            except FileNotFoundError:
+                # File sudah dipangkas (oleh proses ini atau worker lain): render ulang.
+                del _cache_gambar[kunci]
+                future = None
+        if future is None:
+            # Entri dari versi indeks lama tidak akan diminta lagi.
+            for kunci_lama in [k for k in _cache_gambar if k[0] != versi]:
+                del _cache_gambar[kunci_lama]
+            title = f"Subtree Obat: {node.nama_obat.title()}" if node is not root else "BST Obat Keseluruhan"
+            future = executor_gambar.submit(_render_subtree, node, maks_kedalaman, title)
+            _cache_gambar[kunci] = future
+            while len(_cache_gambar) > MAKS_CACHE_GAMBAR:
+                _cache_gambar.popitem(last=False)
+        else:
+            _cache_gambar.move_to_end(kunci)
+    return future
+
+def gambar_subtree_gradio(nama_obat_input, maks_kedalaman):
+    future = gambar_subtree(nama_obat_input, int(maks_kedalaman))
+    if future is None:
+        return None, f"Obat '{nama_obat_input}' tidak ditemukan."
+    try:
+        return future.result(), ""
+    except Exception as e:
+        with _lock_cache_gambar:
+            for kunci in [k for k, f in _cache_gambar.items() if f is future]:
+                del _cache_gambar[kunci]
+        return None, f"Gagal membuat gambar: {e}"
 
 # Fungsi untuk mengisi textbox dari dropdown
 def isi_textbox_dari_dropdown(pilihan_dropdown):
-    if pilihan_dropdown == "-":
+    if not pilihan_dropdown or pilihan_dropdown == "-":
         return ""
     return pilihan_dropdown
 
 
 # Gradio interface (hanya untuk pencarian data)
-with gr.Blocks(theme=gr.themes.Soft()) as demo:
-    gr.Markdown("# ⚕️ Pencarian Data Pemesan Obat Apotek ⚕️")
-    gr.Markdown("Aplikasi ini memungkinkan Anda mencari data pemesan obat.")
-
-    with gr.TabItem("Pencarian Obat"):
-        gr.Markdown("## 🔍 Cari Pemesan Obat")
-        with gr.Row():
-            input_obat = gr.Textbox(label="Ketik Nama Obat", placeholder="Contoh: Paracetamol")
-            dropdown_obat = gr.Dropdown(choices=daftar_obat, label="Atau Pilih dari Daftar", value="-")
+# --- Analitik dari ringkasan (tanpa memindai baris) ---
+def analitik_obat(nama_obat):
+    """Total dan jumlah pesanan per bulan untuk satu obat, atau None jika tidak ada."""
+    with lock_indeks:
+        node = search(root, nama_obat)
+        if node is None:
+            return None
+        return {"nama_obat": node.nama_obat.title(), "total": len(node.data),
+                "per_bulan": ringkasan.per_bulan_obat(nama_obat)}
+
+def analitik_kategori(kategori, n=10):
+    """Obat terbanyak untuk satu Kategori Penyakit, atau None jika kategori tidak ada."""
+    with lock_indeks:
+        total = len(cari_hash(indeks_kategori, kategori))
+        if total == 0:
+            return None
+        teratas = ringkasan.obat_teratas(kategori, n)
+    return {"kategori": str(kategori).strip().title(), "total": total,
+            "obat_teratas": [{"nama_obat": obat.title(), "jumlah": jumlah} for obat, jumlah in teratas]}
+
+def analitik_obat_gradio(nama_obat_input):
+    hasil = analitik_obat(nama_obat_input or "")
+    if hasil is None:
+        return pd.DataFrame(columns=["Bulan", "Jumlah Pesanan"]), f"Obat '{nama_obat_input}' tidak ditemukan."
+    tabel = pd.DataFrame(list(hasil["per_bulan"].items()), columns=["Bulan", "Jumlah Pesanan"])
+    return tabel, f"**{hasil['nama_obat']}**: {hasil['total']} pesanan."
+
+def analitik_kategori_gradio(kategori_input, n):
+    hasil = analitik_kategori(kategori_input or "", int(n))
+    if hasil is None:
+        return pd.DataFrame(columns=["Peringkat", "Nama Obat", "Jumlah Pesanan"]), \
+            f"Kategori '{kategori_input}' tidak ditemukan."
+    tabel = pd.DataFrame([(i, o["nama_obat"], o["jumlah"]) for i, o in enumerate(hasil["obat_teratas"], start=1)],
+                         columns=["Peringkat", "Nama Obat", "Jumlah Pesanan"])
+    return tabel, f"**{hasil['kategori']}**: {hasil['total']} pesanan."
+
+# Fungsi laporan statistik untuk Gradio
+def statistik_gradio(aktif):
+    aktifkan_metrik(aktif)
+    return statistik_indeks(), metrik.ringkasan()
+
+def buat_antarmuka():
+    """Membangun antarmuka Gradio (gradio baru diimpor di sini)."""
+    import gradio as gr
+
+    with gr.Blocks(theme=gr.themes.Soft()) as demo:
+        gr.Markdown("# ⚕️ Pencarian Data Pemesan Obat Apotek ⚕️")
+        gr.Markdown("Aplikasi ini memungkinkan Anda mencari data pemesan obat.")
+
+        with gr.TabItem("Pencarian Obat"):
+            gr.Markdown("## 🔍 Cari Pemesan Obat")
+            with gr.Row():
+                input_obat = gr.Textbox(label="Ketik Nama Obat", placeholder="Contoh: Paracetamol")
+                dropdown_obat = gr.Dropdown(choices=[], label="Saran Nama Obat", value=None)
         
-        cari_btn = gr.Button("Cari Data", variant="primary")
+            fuzzy_obat = gr.Checkbox(label="Toleran salah ketik (fuzzy)", value=False)
+            cari_btn = gr.Button("Cari Data", variant="primary")
         
-        gr.Markdown("### Hasil Pencarian:")
-        hasil_pencarian_df = gr.DataFrame(
-            headers=['Nama Pemesan', 'Kategori Penyakit', 'Tanggal Pesan'],
-            label="Detail Pesanan"
-        )
+            gr.Markdown("### Hasil Pencarian:")
+            keterangan_pencarian = gr.Markdown()
+            hasil_pencarian_df = gr.DataFrame(
+                headers=['Nama Pemesan', 'Kategori Penyakit', 'Tanggal Pesan'],
+                label="Detail Pesanan"
+            )
         
-        dropdown_obat.change(fn=isi_textbox_dari_dropdown, inputs=dropdown_obat, outputs=input_obat)
-        cari_btn.click(fn=cari_obat_gradio, inputs=input_obat, outputs=hasil_pencarian_df)
+            # Event .input hanya dipicu oleh ketikan/pilihan pengguna, sehingga
+            # mengisi textbox dari dropdown tidak memicu ulang pembaruan saran.
+            input_obat.input(fn=saran_obat_gradio, inputs=input_obat, outputs=dropdown_obat,
+                             trigger_mode="always_last", show_progress="hidden")
+            dropdown_obat.input(fn=isi_textbox_dari_dropdown, inputs=dropdown_obat, outputs=input_obat)
+            cari_btn.click(fn=cari_obat_gradio, inputs=[input_obat, fuzzy_obat],
+                           outputs=[hasil_pencarian_df, keterangan_pencarian])
+
+            with gr.Accordion("Statistik Cache Pencarian", open=False):
+                statistik_cache_json = gr.JSON(label="Hit/Miss Cache")
+                statistik_cache_btn = gr.Button("Perbarui Statistik")
+                statistik_cache_btn.click(fn=lambda: cache_hasil.statistik(), outputs=statistik_cache_json)
+
+        with gr.TabItem("Pencarian Pesanan"):
+            gr.Markdown("## 📋 Cari Pesanan per Kategori, Pemesan, atau Tanggal")
+            with gr.Row():
+                mode_pesanan = gr.Dropdown(choices=MODE_PENCARIAN, value=MODE_PENCARIAN[0], label="Cari Berdasarkan")
+                input_pesanan = gr.Textbox(label="Kategori Penyakit / Nama Pemesan", placeholder="Contoh: Migrain")
+            with gr.Row():
+                tanggal_awal = gr.Textbox(label="Tanggal Awal", placeholder="YYYY-MM-DD")
+                tanggal_akhir = gr.Textbox(label="Tanggal Akhir", placeholder="YYYY-MM-DD")
+
+            cari_pesanan_btn = gr.Button("Cari Pesanan", variant="primary")
+            hasil_pesanan_df = gr.DataFrame(headers=KOLOM_PESANAN, label="Daftar Pesanan")
+
+            cari_pesanan_btn.click(fn=cari_pesanan_gradio,
+                                   inputs=[mode_pesanan, input_pesanan, tanggal_awal, tanggal_akhir],
+                                   outputs=hasil_pesanan_df)
+
+        with gr.TabItem("Pencarian Massal"):
+            gr.Markdown("## 📦 Cari Banyak Obat Sekaligus")
+            input_batch = gr.Textbox(label="Daftar Nama Obat", lines=6,
+                                     placeholder="Satu nama obat per baris, contoh:\nParacetamol\nAmlodipine")
+            cari_batch_btn = gr.Button("Cari Semua", variant="primary")
+            keterangan_batch = gr.Markdown()
+            hasil_batch_df = gr.DataFrame(headers=KOLOM_BATCH, label="Pesanan per Obat")
+
+            cari_batch_btn.click(fn=cari_obat_batch_gradio, inputs=input_batch,
+                                 outputs=[hasil_batch_df, keterangan_batch], api_name="cari_obat_batch")
+
+        with gr.TabItem("Visualisasi BST"):
+            gr.Markdown("## 🌳 Visualisasi Subtree Obat")
+            with gr.Row():
+                input_visual = gr.Textbox(label="Nama Obat (kosongkan untuk seluruh pohon)", placeholder="Contoh: Paracetamol")
+                kedalaman_visual = gr.Slider(1, 12, value=4, step=1, label="Kedalaman Maksimum")
+            tampilkan_btn = gr.Button("Tampilkan", variant="primary")
+            keterangan_visual = gr.Markdown()
+            gambar_visual = gr.Image(type="filepath", label="Subtree")
+
+            tampilkan_btn.click(fn=gambar_subtree_gradio, inputs=[input_visual, kedalaman_visual],
+                                outputs=[gambar_visual, keterangan_visual])
+
+        with gr.TabItem("Analitik"):
+            gr.Markdown("## 📊 Pesanan per Bulan dan Obat Terbanyak per Kategori")
+            with gr.Row():
+                input_analitik_obat = gr.Textbox(label="Nama Obat", placeholder="Contoh: Paracetamol")
+                analitik_obat_btn = gr.Button("Pesanan per Bulan", variant="primary")
+            keterangan_analitik_obat = gr.Markdown()
+            hasil_per_bulan_df = gr.DataFrame(headers=["Bulan", "Jumlah Pesanan"], label="Pesanan per Bulan")
+
+            with gr.Row():
+                input_analitik_kategori = gr.Textbox(label="Kategori Penyakit", placeholder="Contoh: Migrain")
+                jumlah_teratas = gr.Slider(1, 50, value=10, step=1, label="Jumlah Obat")
+                analitik_kategori_btn = gr.Button("Obat Terbanyak", variant="primary")
+            keterangan_analitik_kategori = gr.Markdown()
+            hasil_teratas_df = gr.DataFrame(headers=["Peringkat", "Nama Obat", "Jumlah Pesanan"],
+                                            label="Obat Terbanyak")
+
+            analitik_obat_btn.click(fn=analitik_obat_gradio, inputs=input_analitik_obat,
+                                    outputs=[hasil_per_bulan_df, keterangan_analitik_obat])
+            analitik_kategori_btn.click(fn=analitik_kategori_gradio, inputs=[input_analitik_kategori, jumlah_teratas],
+                                        outputs=[hasil_teratas_df, keterangan_analitik_kategori])
+
+        with gr.TabItem("Statistik Indeks"):
+            gr.Markdown("## 📈 Kesehatan Indeks dan Metrik Pencarian")
+            metrik_aktif = gr.Checkbox(label="Aktifkan instrumentasi", value=METRIK_AKTIF)
+            statistik_btn = gr.Button("Perbarui Statistik")
+            with gr.Row():
+                statistik_indeks_json = gr.JSON(label="Statistik Indeks")
+                metrik_json = gr.JSON(label="Counter dan Histogram Latensi")
+
+            statistik_btn.click(fn=statistik_gradio, inputs=metrik_aktif,
+                                outputs=[statistik_indeks_json, metrik_json])
+            metrik_aktif.change(fn=aktifkan_metrik, inputs=metrik_aktif)
+    return demo
+
+# --- API JSON/NDJSON tanpa Gradio (mode headless) ---
+# Endpoint ini memanggil search() langsung dan hanya mengambil satu halaman
+# baris dari df, tanpa membangun DataFrame hasil lengkap atau melewati
+# serialisasi komponen Gradio.
+MAKS_LIMIT_API = 1000
+KOLOM_API = ['Nama Pemesan', 'Kategori Penyakit', 'Tanggal Pesan']
+
+def halaman_obat(nama_obat, offset=0, limit=100):
+    """
+    Mengembalikan (daftar_baris, total) untuk baris pesanan obat ke
+    offset..offset+limit, dengan daftar_baris berupa list of dict (nilai
+    kosong menjadi None), atau (None, 0) jika obat tidak ditemukan.
+    """
+    offset = max(0, int(offset))
+    limit = max(1, min(int(limit), MAKS_LIMIT_API))
+    with lock_indeks:
+        node = search(root, nama_obat)
+        if node is None:
+            return None, 0
+        bagian = df.take(node.data[offset:offset + limit])
+        total = len(node.data)
+    bagian = bagian.reindex(columns=KOLOM_API).astype(object)
+    return bagian.where(bagian.notna(), None).to_dict('records'), total
+
+def buat_api():
+    """Membangun aplikasi FastAPI (fastapi baru diimpor di sini)."""
+    from fastapi import FastAPI
+    from fastapi.responses import JSONResponse, StreamingResponse
+
+    app = FastAPI(title="API Pencarian Obat Apotek")
+
+    @app.get("/api/obat")
+    def api_cari_obat(nama: str, offset: int = 0, limit: int = 100, format: str = "json"):
+        """
+        Pesanan untuk satu obat, dengan paginasi offset/limit. `format=ndjson`
+        mengalirkan satu objek JSON per baris (baris pertama berisi metadata).
+        """
+        baris, total = halaman_obat(nama, offset, limit)
+        if baris is None:
+            return JSONResponse({"detail": f"Obat '{nama}' tidak ditemukan."}, status_code=404)
+
+        offset = max(0, offset)
+        berikutnya = offset + len(baris) if offset + len(baris) < total else None
+        meta = {"nama_obat": nama.strip().title(), "total": total, "offset": offset, "next_offset": berikutnya}
+        if format == "ndjson":
+            def alirkan():
+                yield json.dumps(meta) + "\n"
+                for b in baris:
+                    yield json.dumps(b) + "\n"
+            return StreamingResponse(alirkan(), media_type="application/x-ndjson")
+        return JSONResponse({**meta, "baris": baris})
+
+    @app.get("/api/saran")
+    def api_saran_obat(q: str, limit: int = 10):
+        with lock_indeks:
+            saran = [node.nama_obat.title() for node in cari_prefix(root, q, max(1, min(limit, 100)))]
+        return JSONResponse({"saran": saran})
+
+    @app.get("/api/analitik/obat")
+    def api_analitik_obat(nama: str):
+        hasil = analitik_obat(nama)
+        if hasil is None:
+            return JSONResponse({"detail": f"Obat '{nama}' tidak ditemukan."}, status_code=404)
+        return JSONResponse(hasil)
+
+    @app.get("/api/analitik/kategori")
+    def api_analitik_kategori(kategori: str, n: int = 10):
+        hasil = analitik_kategori(kategori, max(1, min(n, MAKS_LIMIT_API)))
+        if hasil is None:
+            return JSONResponse({"detail": f"Kategori '{kategori}' tidak ditemukan."}, status_code=404)
+        return JSONResponse(hasil)
+
+    @app.get("/api/statistik")
+    def api_statistik():
+        return JSONResponse({"indeks": statistik_indeks(), "metrik": metrik.ringkasan(),
+                             "cache": cache_hasil.statistik(), "metrik_aktif": METRIK_AKTIF})
+
+    return app
+
+def jalankan_api(port=PORT_AWAL, host="127.0.0.1"):
+    """Menjalankan hanya API JSON (tanpa antarmuka Gradio) dengan uvicorn."""
+    import uvicorn
+
+    # Server langsung menerima koneksi; request pertama menunggu indeks siap.
+    mulai_bangun_indeks()
+    PengawasCSV().start()
+    uvicorn.run(buat_api(), host=host, port=port)
+
+# --- Menjalankan layanan: antrean Gradio dan worker multi-proses ---
+def jalankan_aplikasi(jumlah_worker=JUMLAH_WORKER, port_awal=PORT_AWAL, batas_konkurensi=BATAS_KONKURENSI):
+    """
+    Menjalankan aplikasi Gradio. Handler dijalankan di thread pool Gradio
+    dengan maksimal `batas_konkurensi` request bersamaan per event.
+
+    Dengan `jumlah_worker` > 1, proses ini (yang sudah membangun indeks)
+    di-fork menjadi beberapa proses, masing-masing melayani port
+    `port_awal + i` (letakkan load balancer di depannya). Indeks tidak
+    dibangun ulang per proses: halaman memorinya dipakai bersama lewat
+    copy-on-write, dan gc.freeze() menjaga GC agar tidak menyalin halaman
+    tersebut hanya karena memindai objek indeks. Setiap worker menjalankan
+    PengawasCSV sendiri, tetapi hanya worker pertama yang menulis ulang
+    snapshot saat CSV menyusut.
+    """
+    global executor_gambar, TULIS_SNAPSHOT
+    if jumlah_worker <= 1 or not hasattr(os, "fork"):
+        if jumlah_worker > 1:
+            print("Peringatan: fork tidak tersedia di platform ini, berjalan dengan satu worker.")
+        # Indeks dibangun di latar selagi antarmuka dibuat dan server dinyalakan.
+        mulai_bangun_indeks()
+        demo = buat_antarmuka()
+        demo.queue(default_concurrency_limit=batas_konkurensi)
+        # Pesanan baru yang ditambahkan ke CSV langsung masuk ke indeks tanpa restart.
+        PengawasCSV().start()
+        demo.launch()
+        return
+
+    # Indeks dibangun sekali sebelum fork agar dipakai bersama semua worker.
+    pastikan_indeks()
+    demo = buat_antarmuka()
+    demo.queue(default_concurrency_limit=batas_konkurensi)
+    # Thread tidak ikut ter-fork: render yang masih antre dibatalkan (startup
+    # tidak menunggu plotting), hanya render yang sedang berjalan ditunggu
+    # agar tidak ada lock yang sedang dipegang saat fork.
+    executor_gambar.shutdown(wait=True, cancel_futures=True)
+    gc.freeze()
+    daftar_pid = []
+    for i in range(jumlah_worker):
+        pid = os.fork()
+        if pid == 0:
+            TULIS_SNAPSHOT = i == 0
+            executor_gambar = ThreadPoolExecutor(max_workers=1, thread_name_prefix="render-bst")
+            PengawasCSV().start()
+            demo.launch(server_port=port_awal + i)
+            os._exit(0)
+        daftar_pid.append(pid)
+        print(f"Worker {i + 1}/{jumlah_worker} (pid {pid}) melayani port {port_awal + i}.")
+    for pid in daftar_pid:
+        os.waitpid(pid, 0)
+
+# --- Mode CLI: pencarian dari terminal tanpa Gradio dan Matplotlib ---
+def cari_cli(nama_obat, file=None):
+    """
+    Mencetak pesanan satu obat ke terminal. Hanya df dan BST yang dimuat
+    (tanpa indeks sekunder dan ringkasan). Mengembalikan kode keluar proses.
+    """
+    file = file or sys.stdout
+    if not nama_obat.strip():
+        print("Penggunaan: python main.py cari <nama obat>", file=file)
+        return 2
+    if MODE_CSV_BERTAHAP and os.path.exists(PATH_CSV):
+        df_cli, root_cli = muat_data_bertahap()[:2]
+    else:
+        df_cli, root_cli = muat_data()[:2]
+    node = search(root_cli, nama_obat)
+    if node is None:
+        fuzzy = IndeksNgram(n.nama_obat for n in iter_inorder(root_cli))
+        saran = [kunci.title() for kunci, _ in fuzzy.cari(nama_obat, JUMLAH_SARAN)]
+        print(f"Obat '{nama_obat}' tidak ditemukan."
+              + (f" Mungkin maksud Anda: {', '.join(saran)}." if saran else ""), file=file)
+        return 1
+    hasil_df = df_cli.take(node.data).reset_index(drop=True)
+    print(f"{len(hasil_df)} pesanan untuk {node.nama_obat.title()}:", file=file)
+    print(hasil_df.reindex(columns=KOLOM_API).to_string(index=False), file=file)
+    return 0
 
 # --- Bagian untuk demonstrasi output terminal dan Matplotlib ---
-if __name__ == "__main__":
+if __name__ == "__main__" and sys.argv[1:2] == ["api"]:
+    # python main.py api  -> hanya API JSON/NDJSON, tanpa Gradio dan visualisasi
+    jalankan_api()
+elif __name__ == "__main__" and sys.argv[1:2] == ["cari"]:
+    # python main.py cari Paracetamol  -> cetak pesanan lalu keluar
+    sys.exit(cari_cli(" ".join(sys.argv[2:])))
+elif __name__ == "__main__" and sys.argv[1:2] == ["ui"]:
+    # python main.py ui  -> langsung menjalankan Gradio; indeks dibangun di latar
+    jalankan_aplikasi()
+elif __name__ == "__main__":
+    pastikan_indeks()
     print("\n--- Visualisasi BST Keseluruhan (Terminal - Terurut Menurun) ---")
     if root:
         # Panggilan awal untuk root, dianggap sebagai 'last_child_from_parent' 
@@ -297,8 +1995,15 @@ if __name__ == "__main__":
     else:
         print("BST kosong.")
     
-    print("\n--- Membuat Visualisasi BST Keseluruhan (Matplotlib) ---")
-    visualize_bst_matplotlib(root, filename="bst_keseluruhan_matplotlib.png", title="BST Obat Keseluruhan")
+    # Dengan beberapa worker, render yang masih antre dibatalkan sebelum fork;
+    # jangan dijadwalkan agar startup tidak menunggu plotting.
+    render_latar = not (JUMLAH_WORKER > 1 and hasattr(os, "fork"))
+    if render_latar:
+        print("\n--- Membuat Visualisasi BST Keseluruhan (Matplotlib, di background) ---")
+        executor_gambar.submit(visualize_bst_matplotlib, root,
+                               filename="bst_keseluruhan_matplotlib.png", title="BST Obat Keseluruhan")
+    else:
+        print("\n--- Visualisasi Matplotlib dilewati (JUMLAH_WORKER > 1) ---")
 
     # Contoh pencarian dan visualisasi subtree
     nama_obat_dicari = "Paracetamol" # Ganti dengan nama obat yang ada di data Anda untuk tes
@@ -309,14 +2014,15 @@ if __name__ == "__main__":
         print(f"\nSubtree untuk '{nama_obat_dicari.title()}' (Terminal - Terurut Menurun):")
         print_tree_terminal(node_hasil_pencarian, prefix="", is_last_child_from_parent=True)
         
-        print(f"\nMembuat Visualisasi Subtree untuk '{nama_obat_dicari.title()}' (Matplotlib):")
-        visualize_bst_matplotlib(node_hasil_pencarian, 
-                                 filename=f"subtree_{nama_obat_dicari.lower().replace(' ','_')}_matplotlib.png",
-                                 title=f"Subtree Obat: {nama_obat_dicari.title()}")
+        if render_latar:
+            print(f"\nMembuat Visualisasi Subtree untuk '{nama_obat_dicari.title()}' (Matplotlib, di background):")
+            executor_gambar.submit(visualize_bst_matplotlib, node_hasil_pencarian,
+                                   filename=f"subtree_{nama_obat_dicari.lower().replace(' ','_')}_matplotlib.png",
+                                   title=f"Subtree Obat: {nama_obat_dicari.title()}")
     else:
         print(f"Obat '{nama_obat_dicari}' tidak ditemukan dalam BST.")
 
     # Menjalankan aplikasi Gradio (jika ingin tetap ada antarmuka web untuk pencarian)
     print("\n--- Menjalankan Aplikasi Web Gradio untuk Pencarian Data ---")
     print("Visualisasi pohon telah dicetak di terminal (terurut menurun) dan/atau disimpan sebagai file gambar.")
-    demo.launch()
\ No newline at end of file
+    jalankan_aplikasi()
\ No newline at end of file